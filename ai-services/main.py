@@ -1,23 +1,34 @@
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Security, Body
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Security, Body, Request
+from typing import List
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
 import os
+import time
 from dotenv import load_dotenv
+
+# Load env and point model libraries at the local asset bundle before they are imported
+load_dotenv()
+from utils.assets import configure_environment, load_timings, is_offline, asset_dir
+configure_environment()
+
 import nltk
 from services.enhanced_text_analyzer import EnhancedTextAnalyzer
 from services.text_analyzer import TextAnalyzer
 from services.image_analyzer import ImageAnalyzer
 from services.embedding_service import EmbeddingService
 from services.advanced_matching_service import AdvancedMatchingService
+from services.llm_client import LLMClient
+from utils.http_client import AsyncHttpClient
 from models.schemas import *
 from utils.logger import logger
+from utils.metrics import registry, HTTP_REQUEST_SECONDS
+from utils.tracing import tracer
 from pydantic import BaseModel, ValidationError
 import traceback
 
-load_dotenv()
-
 class TextRequest(BaseModel):
     description: str
     
@@ -49,16 +60,87 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security
     return credentials.credentials
 
 # Initialize services
-enhanced_text_analyzer = EnhancedTextAnalyzer()
-text_analyzer = TextAnalyzer()
-image_analyzer = ImageAnalyzer()
+http_client = AsyncHttpClient()
+llm_client = LLMClient()
+enhanced_text_analyzer = EnhancedTextAnalyzer(llm_client=llm_client)
+text_analyzer = TextAnalyzer(enhanced_analyzer=enhanced_text_analyzer)
+image_analyzer = ImageAnalyzer(http_client=http_client, llm_client=llm_client)
 embedding_service = EmbeddingService()
 matching_service = AdvancedMatchingService()
 
+# Scrape-time gauges; stage latency histograms are recorded by the services themselves
+registry.gauge(
+    "ai_cache_hit_ratio",
+    "Lifetime hit ratio of each analysis cache",
+    ("cache",),
+    lambda: {
+        "image_analysis": image_analyzer.get_cache_stats().get("hit_rate"),
+        "text_analysis": enhanced_text_analyzer.get_cache_stats().get("hit_rate")
+    }
+)
+registry.gauge(
+    "ai_executor_queue_depth",
+    "Jobs waiting in or running on each CPU executor",
+    ("executor",),
+    lambda: {
+        **image_analyzer.get_queue_depths(),
+        "emotion_batcher": enhanced_text_analyzer.get_emotion_stats().get("queued")
+    }
+)
+registry.gauge(
+    "ai_llm_queue_depth",
+    "LLM calls waiting for rate-limit budget per priority lane",
+    ("lane",),
+    lambda: {lane: stats["depth"] for lane, stats in llm_client.scheduler.get_stats()["lanes"].items()}
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so path parameters don't explode the series count
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method,
+            route.path if route is not None else "unmatched",
+            status
+        )
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    if not tracer.should_trace(request.url.path):
+        return await call_next(request)
+
+    with tracer.start(
+        f"{request.method} {request.url.path}",
+        request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path}
+    ) as root:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"
+            root.set_attribute("http.route", route.path)
+        root.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            root.error = f"HTTP {response.status_code}"
+
+        response.headers["X-Trace-Id"] = root.trace.trace_id
+        if tracer.server_timing:
+            response.headers["Server-Timing"] = tracer.server_timing_header(root)
+        return response
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting Enhanced AI Services with Gemini AI...")
     try:
+        await http_client.start()
         await enhanced_text_analyzer.initialize()
         await text_analyzer.initialize()
         await image_analyzer.initialize()
@@ -69,6 +151,13 @@ async def startup_event():
         logger.error(f"Service initialization failed: {str(e)}")
         logger.error(traceback.format_exc())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Shutting down Enhanced AI Services...")
+    await http_client.close()
+    image_analyzer.shutdown()
+    enhanced_text_analyzer.shutdown()
+
 @app.get("/")
 async def root():
     return {
@@ -97,12 +186,30 @@ async def health_check():
         },
         "ai_models": {
             "gemini_ai": bool(os.getenv("GEMINI_API_KEY")),
+            "llm": llm_client.get_stats(),
+            "emotion_classifier": enhanced_text_analyzer.get_emotion_stats(),
             "openai": bool(os.getenv("OPENAI_API_KEY")),
             "sentence_transformers": True,
             "spacy_nlp": True
-        }
+        },
+        "assets": {
+            "offline_mode": is_offline(),
+            "asset_dir": asset_dir(),
+            "model_load_ms": load_timings
+        },
+        "caches": {
+            "image_analysis": image_analyzer.get_cache_stats(),
+            "text_analysis": enhanced_text_analyzer.get_cache_stats()
+        },
+        "perceptual_hash_index": image_analyzer.hash_index.get_stats(),
+        "tracing": tracer.get_stats()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint (unauthenticated, like /health)"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/analyze/text", response_model=TextAnalysisResponse)
 async def analyze_text(
     request: TextAnalysisRequest,
@@ -177,6 +284,135 @@ async def analyze_images(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Image analysis failed: {str(e)}")
 
+# Direct uploads: same pipeline and response as /analyze/images, without the Cloudinary round trip
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_FILES = int(os.getenv("IMAGE_UPLOAD_MAX_FILES", 10))
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an uploaded file in chunks, rejecting it once it passes the download size cap"""
+    chunks = []
+    received = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        received += len(chunk)
+        if received > http_client.max_response_bytes:
+            raise HTTPException(status_code=413, detail=f"Image {file.filename} exceeds {http_client.max_response_bytes} bytes")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+@app.post("/analyze/images/upload", response_model=ImageAnalysisResponse)
+async def analyze_uploaded_images(
+    files: List[UploadFile] = File(...),
+    api_key: str = Depends(verify_api_key)
+):
+    try:
+        logger.info(f"Received image upload analysis request with {len(files)} files")
+        if not files:
+            raise HTTPException(status_code=400, detail="No images uploaded")
+        if len(files) > MAX_UPLOAD_FILES:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_UPLOAD_FILES} images per request")
+        
+        images = [(file.filename or f"image{i + 1}", await read_upload(file)) for i, file in enumerate(files)]
+        analysis = await image_analyzer.analyze_bytes(images)
+        return ImageAnalysisResponse(**analysis)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Uploaded image analysis failed: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Image analysis failed: {str(e)}")
+
+@app.post("/analyze/images/raw", response_model=ImageAnalysisResponse)
+async def analyze_raw_image(
+    request: Request,
+    api_key: str = Depends(verify_api_key)
+):
+    """Single image sent as the raw request body (streamed); optional X-Filename header"""
+    try:
+        data = bytearray()
+        async for chunk in request.stream():
+            data.extend(chunk)
+            if len(data) > http_client.max_response_bytes:
+                raise HTTPException(status_code=413, detail=f"Image exceeds {http_client.max_response_bytes} bytes")
+        if not data:
+            raise HTTPException(status_code=400, detail="Empty request body")
+        
+        name = request.headers.get("x-filename", "image")
+        analysis = await image_analyzer.analyze_bytes([(name, bytes(data))])
+        return ImageAnalysisResponse(**analysis)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Raw image analysis failed: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Image analysis failed: {str(e)}")
+
+@app.post("/images/hash-index")
+async def index_image_hashes(
+    request: ImageHashIndexRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    try:
+        await image_analyzer.hash_index.add(request.item_id, request.hashes)
+        return {"success": True, "item_id": request.item_id, "indexed": len(request.hashes)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid perceptual hash: {str(e)}")
+    except Exception as e:
+        logger.error(f"Image hash indexing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Image hash indexing failed: {str(e)}")
+
+@app.delete("/images/hash-index/{item_id}")
+async def remove_image_hashes(
+    item_id: str,
+    api_key: str = Depends(verify_api_key)
+):
+    try:
+        return {"success": True, "removed": await image_analyzer.hash_index.remove(item_id)}
+    except Exception as e:
+        logger.error(f"Image hash removal failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Image hash removal failed: {str(e)}")
+
+@app.post("/images/near-duplicates")
+async def find_near_duplicates(
+    request: NearDuplicateQueryRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    try:
+        hashes = list(request.hashes or [])
+        if request.image_urls:
+            hashes += await image_analyzer.perceptual_hashes(request.image_urls)
+        if not hashes:
+            raise HTTPException(status_code=400, detail="No hashes or image URLs provided")
+        
+        matches = await image_analyzer.hash_index.query(
+            hashes,
+            max_distance=request.max_distance,
+            exclude_item_id=request.exclude_item_id,
+            limit=request.limit
+        )
+        return {"success": True, "hashes": hashes, "matches": matches}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid perceptual hash: {str(e)}")
+    except Exception as e:
+        logger.error(f"Near-duplicate search failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Near-duplicate search failed: {str(e)}")
+
+@app.post("/cache/images/invalidate")
+async def invalidate_image_cache(
+    request: CacheInvalidationRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    try:
+        removed = await image_analyzer.invalidate_cache(request.image_urls, request.content_hashes)
+        logger.info(f"Invalidated {removed} cached image analyses")
+        return {"success": True, "removed": removed}
+    except Exception as e:
+        logger.error(f"Image cache invalidation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Image cache invalidation failed: {str(e)}")
+
 # Add a debug endpoint to test the image analyzer directly
 @app.post("/analyze/images/debug")
 async def debug_image_analysis(
@@ -325,6 +561,41 @@ async def analyze_text_enhanced(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
 
+# Bulk re-analysis for backfills and imports
+MAX_TEXT_BATCH = int(os.getenv("TEXT_BATCH_MAX_ITEMS", 100))
+
+@app.post("/analyze/text/batch")
+async def analyze_text_batch(
+    request: TextBatchRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    try:
+        logger.info(f"Received batch text analysis request with {len(request.descriptions)} descriptions")
+        if not request.descriptions:
+            raise HTTPException(status_code=400, detail="No descriptions provided")
+        if len(request.descriptions) > MAX_TEXT_BATCH:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_TEXT_BATCH} descriptions per request")
+        for index, description in enumerate(request.descriptions):
+            if not description or len(description.strip()) == 0:
+                raise HTTPException(status_code=400, detail=f"Description {index} cannot be empty")
+        
+        analyses = await enhanced_text_analyzer.analyze_batch(request.descriptions)
+        return {
+            "success": True,
+            "count": len(analyses),
+            "results": [
+                {"index": index, "analysis": analysis, "confidence": analysis.get('confidence_score', 0.5)}
+                for index, analysis in enumerate(analyses)
+            ]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch text analysis failed: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Batch text analysis failed: {str(e)}")
+
 # Debug endpoint to check request structure
 @app.post("/analyze/text-enhanced-debug")
 async def analyze_text_enhanced_debug(
@@ -9,6 +9,9 @@ class TextAnalysisRequest(BaseModel):
     category: str
     tags: Optional[List[str]] = []
 
+class TextBatchRequest(BaseModel):
+    descriptions: List[str]
+
 class TextAnalysisResponse(BaseModel):
     keywords: List[str]
     sentiment: str
@@ -29,6 +32,11 @@ class ImageAnalysisResponse(BaseModel):
     colors: List[Dict[str, Any]]
     gemini_description: str
     gemini_tags: List[str]
+    visual_embedding: Optional[List[float]] = []
+    visual_embedding_model: Optional[str] = None
+    perceptual_hashes: Optional[List[str]] = []
+    timings_ms: Optional[Dict[str, float]] = {}
+    per_image: Optional[List[Dict[str, Any]]] = []
 
 class EmbeddingRequest(BaseModel):
     text: Optional[Dict[str, Any]] = None
@@ -37,6 +45,12 @@ class EmbeddingRequest(BaseModel):
 class EmbeddingResponse(BaseModel):
     textEmbedding: List[float]
     imageFeatures: List[float]
+    imageFeaturesVersion: Optional[str] = None
+    visualEmbedding: Optional[List[float]] = []
+    visualEmbeddingModel: Optional[str] = None
+    textEmbeddingReduced: Optional[List[float]] = []
+    projectionVersion: Optional[str] = None
+    perceptualHashes: Optional[List[str]] = []
 
 class ItemData(BaseModel):
     id: str
@@ -50,6 +64,20 @@ class ItemData(BaseModel):
     tags: Optional[List[str]] = []
 class ImageAnalysisRequest(BaseModel):
     image_urls: List[str]
+class ImageHashIndexRequest(BaseModel):
+    item_id: str
+    hashes: List[str]
+class NearDuplicateQueryRequest(BaseModel):
+    # Query by stored hashes or by image URLs (hashed on the fly)
+    hashes: Optional[List[str]] = []
+    image_urls: Optional[List[str]] = []
+    max_distance: Optional[int] = 10
+    exclude_item_id: Optional[str] = None
+    limit: Optional[int] = 20
+class CacheInvalidationRequest(BaseModel):
+    # Omit both to clear the whole cache
+    image_urls: Optional[List[str]] = []
+    content_hashes: Optional[List[str]] = []
 class AdvancedMatchingRequest(BaseModel):
     source_item: ItemData
     candidate_items: List[ItemData]
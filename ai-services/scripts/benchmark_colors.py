@@ -0,0 +1,97 @@
+"""
+Per-image timing of the dominant-color engines against the previous
+KMeans(n_clusters=5, n_init=10) implementation.
+
+Usage (from the ai-services directory):
+    python -m scripts.benchmark_colors [image files...] [--repeat 5]
+
+Without image files a set of synthetic test images is used.
+"""
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.color_engine import dominant_colors, dominant_colors_refined, rgb_to_color_name
+
+
+def legacy_kmeans(pixels: np.ndarray):
+    """The original per-image KMeans implementation, for comparison"""
+    from sklearn.cluster import KMeans
+
+    kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
+    kmeans.fit(pixels)
+    colors = []
+    for i, center in enumerate(kmeans.cluster_centers_):
+        percentage = np.count_nonzero(kmeans.labels_ == i) / len(kmeans.labels_) * 100
+        if percentage > 5:
+            colors.append({"color": rgb_to_color_name(center), "percentage": round(percentage, 1)})
+    colors.sort(key=lambda x: x["percentage"], reverse=True)
+    return colors[:3]
+
+
+def synthetic_images(count: int = 8):
+    rng = np.random.default_rng(7)
+    images = []
+    for _ in range(count):
+        image = np.zeros((600, 800, 3), dtype=np.uint8)
+        image[:] = rng.integers(0, 256, 3)
+        for _ in range(4):
+            x, y = rng.integers(0, 700), rng.integers(0, 500)
+            w, h = rng.integers(50, 300), rng.integers(50, 300)
+            image[y:y + h, x:x + w] = rng.integers(0, 256, 3)
+        noise = rng.normal(0, 12, image.shape)
+        images.append(np.clip(image + noise, 0, 255).astype(np.uint8))
+    return images
+
+
+def to_pixels(image_bgr: np.ndarray) -> np.ndarray:
+    small = cv2.resize(image_bgr, (150, 150), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB).reshape(-1, 3)
+
+
+def time_engine(engine, pixel_sets, repeat: int):
+    results = [engine(pixels) for pixels in pixel_sets]  # warm-up and outputs
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for pixels in pixel_sets:
+            engine(pixels)
+    per_image_ms = (time.perf_counter() - start) * 1000 / (repeat * len(pixel_sets))
+    return per_image_ms, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dominant-color engine benchmark")
+    parser.add_argument('images', nargs='*', help="Image files to analyze (default: synthetic images)")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    images = [cv2.imread(path) for path in args.images] if args.images else synthetic_images()
+    pixel_sets = [to_pixels(image) for image in images if image is not None]
+
+    engines = [
+        ("kmeans n_init=10 (previous)", legacy_kmeans),
+        ("histogram + Lab LUT", dominant_colors),
+        ("histogram-seeded minibatch", dominant_colors_refined),
+    ]
+
+    baseline = None
+    print(f"{len(pixel_sets)} images, {len(pixel_sets[0])} pixels each")
+    for name, engine in engines:
+        per_image_ms, results = time_engine(engine, pixel_sets, args.repeat)
+        if baseline is None:
+            baseline = results
+            agreement = 1.0
+        else:
+            agreement = np.mean([
+                bool(a) and bool(b) and a[0]["color"] == b[0]["color"] for a, b in zip(baseline, results)
+            ])
+        print(f"  {name:<30} {per_image_ms:8.2f} ms/image   top-color agreement {agreement:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Parity check and throughput benchmark for the text embedding backends.
+
+Compares a candidate backend (onnx, onnx_int8, int8) against the fp32 PyTorch
+model: cosine agreement per sentence must stay above --min-cosine, and encodes
+per second are reported at each batch size. Exits non-zero on a parity failure.
+
+Usage (from the ai-services directory):
+    python -m scripts.benchmark_embeddings --backend onnx_int8 [--min-cosine 0.99]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_DESCRIPTIONS = [
+    "Lost black leather wallet near the central library, has my student ID inside",
+    "Found a blue HP laptop bag at the cafeteria around 2pm",
+    "Missing silver Casio watch, probably dropped near the main gate",
+    "Lost my keys with a red keychain somewhere between hostel and campus",
+    "Found an iPhone with a cracked screen in lecture hall 3",
+    "Small brown teddy bear found on the bus stop bench",
+    "Lost a green water bottle with stickers at the sports complex",
+    "Please help! Lost my passport and driving license, urgent",
+    "Found a pair of black Nike shoes in the gym locker room",
+    "Lost white Samsung earbuds in a grey case near the parking lot",
+    "Gold necklace with a small heart pendant lost at the mall",
+    "Found a maths textbook with notes inside at the reading room",
+]
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def throughput(model, batch_size: int, iterations: int) -> float:
+    texts = [SAMPLE_DESCRIPTIONS[i % len(SAMPLE_DESCRIPTIONS)] for i in range(batch_size)]
+    model.encode(texts, batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        model.encode(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return batch_size * iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend parity and throughput benchmark")
+    parser.add_argument('--backend', default='onnx', help="Candidate backend: int8, onnx or onnx_int8")
+    parser.add_argument('--min-cosine', type=float, default=0.99, help="Minimum per-sentence cosine vs fp32")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    from services.text_encoder import load_text_encoder
+
+    reference = load_text_encoder(backend='torch')
+    candidate = load_text_encoder(backend=args.backend)
+
+    ref_vectors = np.asarray(reference.encode(SAMPLE_DESCRIPTIONS), dtype=np.float32)
+    cand_vectors = np.asarray(candidate.encode(SAMPLE_DESCRIPTIONS), dtype=np.float32)
+    cosines = cosine_rows(ref_vectors, cand_vectors)
+
+    print(f"Parity {args.backend} vs torch fp32 over {len(cosines)} sentences:")
+    print(f"  mean cosine {cosines.mean():.5f}, min cosine {cosines.min():.5f} (required >= {args.min_cosine})")
+
+    print("Throughput (encodes/sec):")
+    print(f"  {'batch':>5}  {'torch':>10}  {args.backend:>10}  {'speedup':>7}")
+    for batch_size in args.batch_sizes:
+        ref_rate = throughput(reference, batch_size, args.iterations)
+        cand_rate = throughput(candidate, batch_size, args.iterations)
+        print(f"  {batch_size:>5}  {ref_rate:>10.1f}  {cand_rate:>10.1f}  {cand_rate / ref_rate:>6.2f}x")
+
+    if cosines.min() < args.min_cosine:
+        print("PARITY FAILED")
+        sys.exit(1)
+    print("PARITY OK")
+
+
+if __name__ == "__main__":
+    main()
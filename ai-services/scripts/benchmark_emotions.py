@@ -0,0 +1,129 @@
+"""
+Parity report and throughput benchmark for the emotion classifier.
+
+Backend parity: compares a candidate backend (int8, onnx, onnx_int8) against
+the fp32 PyTorch pipeline - top-label and emotional-tone agreement must stay
+above --min-agreement, and texts per second are reported at each batch size.
+
+LLM parity (--llm): compares the emotional_tone the LLM returns with the tone
+derived from the fp32 classifier, i.e. what changes when EMOTION_CLASSIFIER=auto
+skips the classifier for LLM-answered descriptions. Needs LLM credentials.
+
+Exits non-zero on a backend parity failure.
+
+Usage (from the ai-services directory):
+    python -m scripts.benchmark_emotions --backend onnx_int8 [--min-agreement 0.95]
+    python -m scripts.benchmark_emotions --llm [--input descriptions.txt]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.benchmark_embeddings import SAMPLE_DESCRIPTIONS
+
+
+def top_labels(outputs):
+    return [max(scores, key=lambda x: x['score'])['label'] for scores in outputs]
+
+
+def max_score_delta(reference, candidate) -> float:
+    delta = 0.0
+    for ref_scores, cand_scores in zip(reference, candidate):
+        cand = {s['label']: s['score'] for s in cand_scores}
+        delta = max(delta, max(abs(s['score'] - cand.get(s['label'], 0.0)) for s in ref_scores))
+    return delta
+
+
+def throughput(classifier, texts, batch_size: int, iterations: int) -> float:
+    batch = [texts[i % len(texts)] for i in range(batch_size)]
+    classifier(batch, batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        classifier(batch, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return batch_size * iterations / elapsed
+
+
+async def llm_tones(descriptions):
+    from services.llm_client import LLMClient
+    from services.enhanced_text_analyzer import EnhancedTextAnalyzer
+
+    analyzer = EnhancedTextAnalyzer(llm_client=LLMClient())
+    analyzer.llm_client.initialize()
+    if not analyzer.llm_client.available:
+        raise SystemExit("No LLM provider configured (set GEMINI_API_KEY, OPENAI_API_KEY or LLM_PROVIDERS=stub)")
+
+    async def tone(description):
+        try:
+            analysis = await analyzer._request_gemini_analysis(description)
+            return str(analysis.get('emotional_tone', '')).lower() or None
+        except Exception:
+            return None
+
+    return await asyncio.gather(*(tone(description) for description in descriptions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion classifier parity report and throughput benchmark")
+    parser.add_argument('--backend', default='onnx_int8', help="Candidate backend: int8, onnx or onnx_int8")
+    parser.add_argument('--min-agreement', type=float, default=0.95, help="Minimum top-label agreement vs fp32")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--input', help="File with one description per line (default: built-in samples)")
+    parser.add_argument('--llm', action='store_true', help="Report LLM emotional_tone vs classifier tone instead")
+    args = parser.parse_args()
+
+    from services.emotion_classifier import load_emotion_classifier, tone_for
+
+    descriptions = SAMPLE_DESCRIPTIONS
+    if args.input:
+        with open(args.input) as f:
+            descriptions = [line.strip() for line in f if line.strip()]
+
+    reference = load_emotion_classifier(backend='torch')
+    ref_outputs = reference(descriptions)
+    ref_tones = [tone_for(scores) for scores in ref_outputs]
+
+    if args.llm:
+        tones = asyncio.run(llm_tones(descriptions))
+        answered = [(llm, local) for llm, local in zip(tones, ref_tones) if llm]
+        agree = sum(1 for llm, local in answered if llm == local)
+        print(f"LLM emotional_tone vs classifier tone over {len(descriptions)} descriptions:")
+        print(f"  LLM answered {len(answered)}, agreement {agree / max(1, len(answered)):.1%}")
+        print("  Most common disagreements (llm -> classifier):")
+        for (llm, local), count in Counter((l, c) for l, c in answered if l != c).most_common(10):
+            print(f"    {llm:>12} -> {local:<12} {count}")
+        return
+
+    candidate = load_emotion_classifier(backend=args.backend)
+    cand_outputs = candidate(descriptions)
+    ref_labels = top_labels(ref_outputs)
+    cand_labels = top_labels(cand_outputs)
+    label_agreement = sum(r == c for r, c in zip(ref_labels, cand_labels)) / len(descriptions)
+    tone_agreement = sum(r == tone_for(c) for r, c in zip(ref_tones, cand_outputs)) / len(descriptions)
+
+    print(f"Parity {args.backend} vs torch fp32 over {len(descriptions)} descriptions:")
+    print(f"  top-label agreement {label_agreement:.1%}, tone agreement {tone_agreement:.1%} (required >= {args.min_agreement:.0%})")
+    print(f"  max score delta {max_score_delta(ref_outputs, cand_outputs):.4f}")
+
+    print("Throughput (texts/sec):")
+    print(f"  {'batch':>5}  {'torch':>10}  {args.backend:>10}  {'speedup':>7}")
+    for batch_size in args.batch_sizes:
+        ref_rate = throughput(reference, descriptions, batch_size, args.iterations)
+        cand_rate = throughput(candidate, descriptions, batch_size, args.iterations)
+        print(f"  {batch_size:>5}  {ref_rate:>10.1f}  {cand_rate:>10.1f}  {cand_rate / ref_rate:>6.2f}x")
+
+    if label_agreement < args.min_agreement:
+        print("PARITY FAILED")
+        sys.exit(1)
+    print("PARITY OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Pre-fetch every model and corpus used by the AI services into a versioned local
+asset directory so nodes can start with AI_OFFLINE_MODE=true.
+
+Usage (from the ai-services directory):
+    python -m scripts.fetch_assets [--asset-dir assets] [--version 2024.1] [--onnx] [--verify]
+    python -m scripts.fetch_assets --verify-only   # check an existing bundle without fetching
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+
+def verify_bundle():
+    """
+    Load every asset from the bundle in strict offline mode and report load times.
+    The hub reads its offline flags at import time, so this must run in a process
+    that has not imported transformers or sentence_transformers yet.
+    """
+    if 'transformers' in sys.modules or 'sentence_transformers' in sys.modules:
+        raise RuntimeError("verify_bundle() must run in a fresh process - use --verify-only")
+    os.environ['AI_OFFLINE_MODE'] = 'true'
+
+    from utils import assets
+    assets.configure_environment()
+    assets.ensure_nltk_resources()
+
+    from sentence_transformers import SentenceTransformer
+    from transformers import pipeline
+    import spacy
+
+    for name in assets.SENTENCE_TRANSFORMER_MODELS:
+        with assets.timed_load(name):
+            SentenceTransformer(assets.resolve_model('sentence_transformers', name))
+    for name in assets.TRANSFORMER_MODELS:
+        with assets.timed_load(name):
+            pipeline("text-classification", model=assets.resolve_model('transformers', name))
+    for name in assets.SPACY_MODELS:
+        with assets.timed_load(name):
+            spacy.load(assets.resolve_model('spacy', name))
+
+    return assets.load_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch AI service models into a local asset bundle")
+    parser.add_argument('--asset-dir', help="Root directory for asset bundles (default: $AI_ASSET_DIR or ./assets)")
+    parser.add_argument('--version', help="Bundle version (default: $AI_ASSET_VERSION or built-in version)")
+    parser.add_argument('--onnx', action='store_true', help="Also export the embedding and emotion models to ONNX (fp32 and int8)")
+    parser.add_argument('--verify', action='store_true', help="Reload the bundle offline and report load times")
+    parser.add_argument('--verify-only', action='store_true', help="Only verify an existing bundle (no fetch)")
+    args = parser.parse_args()
+
+    if args.asset_dir:
+        os.environ['AI_ASSET_DIR'] = args.asset_dir
+    if args.version:
+        os.environ['AI_ASSET_VERSION'] = args.version
+
+    if args.verify_only:
+        print("Offline load times:")
+        for name, elapsed_ms in verify_bundle().items():
+            print(f"  {name}: {elapsed_ms:.0f} ms")
+        return
+
+    from utils import assets
+
+    manifest = assets.fetch_all()
+    print(f"Asset bundle {manifest['version']} written to {assets.asset_dir()}")
+    print(f"  nltk: {', '.join(manifest['nltk'])}")
+    for kind in ('sentence_transformers', 'transformers', 'spacy', 'torchvision'):
+        for name, path in manifest[kind].items():
+            print(f"  {kind}: {name} -> {path}")
+
+    if args.onnx:
+        from services.text_encoder import export_onnx
+        from services.emotion_classifier import export_onnx as export_emotion_onnx
+        print(f"  onnx: {export_onnx()}")
+        print(f"  onnx: {export_emotion_onnx()}")
+
+    if args.verify:
+        # Fetching imported the model libraries online; verify from a clean interpreter
+        # with the offline flags set before anything is imported
+        env = {**os.environ, 'AI_OFFLINE_MODE': 'true', 'HF_HUB_OFFLINE': '1', 'TRANSFORMERS_OFFLINE': '1'}
+        result = subprocess.run([sys.executable, '-m', 'scripts.fetch_assets', '--verify-only'], cwd=SERVICE_DIR, env=env)
+        if result.returncode != 0:
+            print("Offline verification FAILED - the bundle is incomplete")
+            sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Fit (or refresh) the embedding projection used for first-stage retrieval and
+report recall@K of the reduced ranking against the full-dimension ranking.
+
+The input is an export of items (JSON array or JSON lines) carrying text
+embeddings in aiMetadata.textEmbedding, textEmbedding or text_embedding, e.g.
+    mongoexport --collection items --fields aiMetadata.textEmbedding --out items.jsonl
+
+Usage (from the ai-services directory):
+    python -m scripts.fit_projection --input items.jsonl [--method pca] [--dim 96]
+    python -m scripts.fit_projection --input items.jsonl --report-only
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def extract_embedding(record):
+    metadata = record.get('aiMetadata') or {}
+    return metadata.get('textEmbedding') or record.get('textEmbedding') or record.get('text_embedding')
+
+
+def load_embeddings(path: str) -> np.ndarray:
+    with open(path) as f:
+        content = f.read().strip()
+
+    if content.startswith('['):
+        records = json.loads(content)
+    else:
+        records = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    embeddings = [extract_embedding(record) for record in records]
+    embeddings = np.array([e for e in embeddings if e and any(e)], dtype=np.float32)
+    if len(embeddings) == 0:
+        raise SystemExit(f"No text embeddings found in {path}")
+    return embeddings
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[1])
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def recall_report(projector, embeddings: np.ndarray, ks, shortlist: int, queries: int, seed: int = 0):
+    """
+    recall@K: overlap of the reduced top-K with the full top-K.
+    shortlist recall: fraction of the full top-K that survives a reduced shortlist,
+    which is what matters when the full vectors rerank the shortlist.
+    """
+    rng = np.random.default_rng(seed)
+    query_idx = rng.choice(len(embeddings), size=min(queries, len(embeddings)), replace=False)
+
+    full = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+    reduced = projector.transform(embeddings)
+
+    full_scores = full[query_idx] @ full.T
+    reduced_scores = reduced[query_idx] @ reduced.T
+    # Never count the query itself as a neighbour
+    full_scores[np.arange(len(query_idx)), query_idx] = -np.inf
+    reduced_scores[np.arange(len(query_idx)), query_idx] = -np.inf
+
+    report = {}
+    shortlist_idx = top_k(reduced_scores, shortlist)
+    for k in ks:
+        full_top = top_k(full_scores, k)
+        reduced_top = top_k(reduced_scores, k)
+        recall = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(full_top, reduced_top)])
+        survived = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(full_top, shortlist_idx)])
+        report[k] = (recall, survived)
+    return report
+
+
+def print_report(label, projector, report, shortlist):
+    print(f"{label}: {projector.version} ({projector.input_dim} -> {projector.dim} dims, "
+          f"{projector.input_dim / projector.dim:.1f}x smaller)")
+    for k, (recall, survived) in report.items():
+        print(f"  recall@{k:<3} {recall:.3f}   full top-{k} kept in reduced top-{shortlist}: {survived:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the embedding projection and report recall@K")
+    parser.add_argument('--input', required=True, help="JSON/JSONL export of items with text embeddings")
+    parser.add_argument('--method', default='pca', choices=['pca', 'random'])
+    parser.add_argument('--dim', type=int, default=96, help="Reduced dimension (64-128 recommended)")
+    parser.add_argument('--output', help="Projection file (default: $EMBEDDING_PROJECTION_PATH)")
+    parser.add_argument('--k', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--shortlist', type=int, default=50, help="First-stage shortlist size for the rerank report")
+    parser.add_argument('--queries', type=int, default=500, help="Number of sampled queries for the report")
+    parser.add_argument('--report-only', action='store_true', help="Evaluate the existing projection without refitting")
+    args = parser.parse_args()
+
+    from services.embedding_projection import EmbeddingProjector, projection_path
+
+    output = args.output or projection_path()
+    embeddings = load_embeddings(args.input)
+    print(f"Loaded {len(embeddings)} embeddings of dimension {embeddings.shape[1]}")
+
+    current = EmbeddingProjector.load(output) if os.path.exists(output) else None
+    if current is not None:
+        report = recall_report(current, embeddings, args.k, args.shortlist, args.queries)
+        print_report("Current projection", current, report, args.shortlist)
+
+    if args.report_only:
+        if current is None:
+            raise SystemExit(f"No projection found at {output}")
+        return
+
+    projector = EmbeddingProjector.fit(embeddings, method=args.method, dim=args.dim)
+    report = recall_report(projector, embeddings, args.k, args.shortlist, args.queries)
+    print_report("New projection", projector, report, args.shortlist)
+
+    projector.save(output)
+    print(f"Saved projection to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -582,7 +582,12 @@ import spacy
 from geopy.distance import geodesic
 from datetime import datetime, timedelta
 import re
+import os
 from utils.logger import logger
+from utils.assets import resolve_model, timed_load
+from utils.metrics import timed_stage
+from .embedding_projection import load_projector
+from .perceptual_hash import hamming_distance, HASH_BITS
 
 class AdvancedMatchingService:
     def __init__(self):
@@ -594,11 +599,20 @@ class AdvancedMatchingService:
         )
         self.confidence_threshold = 0.7
         self.max_matches = 10
+        self.projector = None
+        self.shortlist_factor = int(os.getenv("PROJECTION_SHORTLIST_FACTOR", 5))
+        self.min_shortlist = int(os.getenv("PROJECTION_MIN_SHORTLIST", 50))
+        # Hamming distance (of 64 bits) at which two photos count as the same object
+        self.duplicate_hash_distance = int(os.getenv("PHASH_DUPLICATE_DISTANCE", 8))
 
     async def initialize(self):
+        # Optional reduced-dimension first stage (MATCHING_USE_PROJECTION=true)
+        self.projector = load_projector()
+
         try:
             # Load spaCy model for advanced NLP
-            self.nlp = spacy.load("en_core_web_sm")
+            with timed_load('en_core_web_sm'):
+                self.nlp = spacy.load(resolve_model('spacy', 'en_core_web_sm'))
             logger.info("Advanced matching service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize advanced matching service: {str(e)}")
@@ -618,6 +632,9 @@ class AdvancedMatchingService:
 
             matches = []
 
+            if self.projector is not None:
+                candidate_items = self._shortlist_candidates(source_item, candidate_items, max_matches)
+
             for candidate in candidate_items:
                 similarity_result = await self.calculate_comprehensive_similarity(source_item, candidate)
                 logger.info(similarity_result)
@@ -641,6 +658,48 @@ class AdvancedMatchingService:
             logger.error(f"Error in advanced matching: {str(e)}")
             return []
 
+    def _reduced_embedding(self, item: Dict[str, Any]):
+        """Stored reduced vector if it came from the current projection, else project the full one"""
+        ai_metadata = item.get('aiMetadata', {})
+        reduced = ai_metadata.get('textEmbeddingReduced')
+        if reduced and ai_metadata.get('projectionVersion') == self.projector.version:
+            return np.asarray(reduced, dtype=np.float32)
+
+        full = ai_metadata.get('textEmbedding')
+        if full and len(full) == self.projector.input_dim and any(full):
+            return self.projector.transform(np.asarray(full, dtype=np.float32))
+        return None
+
+    def _shortlist_candidates(self, source_item: Dict[str, Any], candidate_items: List[Dict[str, Any]], max_matches: int) -> List[Dict[str, Any]]:
+        """
+        First-stage retrieval on reduced embeddings: keep the top candidates by dot
+        product for full multi-factor scoring. Candidates without a text embedding
+        are always kept since they can still match on other factors.
+        """
+        shortlist_size = max(max_matches * self.shortlist_factor, self.min_shortlist)
+        if len(candidate_items) <= shortlist_size:
+            return candidate_items
+
+        source_vector = self._reduced_embedding(source_item)
+        if source_vector is None:
+            return candidate_items
+
+        scored, unscored = [], []
+        for candidate in candidate_items:
+            vector = self._reduced_embedding(candidate)
+            if vector is None:
+                unscored.append(candidate)
+            else:
+                scored.append((vector, candidate))
+
+        if not scored:
+            return candidate_items
+
+        scores = np.stack([vector for vector, _ in scored]) @ source_vector
+        keep = np.argsort(-scores)[:shortlist_size]
+        logger.info(f"Projection shortlist kept {len(keep)} of {len(scored)} embedded candidates")
+        return [scored[i][1] for i in keep] + unscored
+
     def _get_item_id(self, item: Dict[str, Any]) -> str:
         """Extract item ID from either MongoDB ObjectId format or direct string"""
         if '_id' in item:
@@ -661,6 +720,7 @@ class AdvancedMatchingService:
             return datetime.fromisoformat(date_field.replace('Z', '+00:00'))
         return None
 
+    @timed_stage("match_comprehensive")
     async def calculate_comprehensive_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> Dict[str, Any]:
         try:
             reasons = []
@@ -742,6 +802,7 @@ class AdvancedMatchingService:
                 'detailed_scores': {}
             }
 
+    @timed_stage("match_text")
     async def calculate_enhanced_text_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> float:
         try:
             # Combine multiple text similarity approaches
@@ -776,6 +837,7 @@ class AdvancedMatchingService:
             logger.error(f"Error calculating enhanced text similarity: {str(e)}")
             return 0
 
+    @timed_stage("match_fields")
     async def calculate_field_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> float:
         try:
             analysis1 = item1.get('aiMetadata', {}).get('textAnalysis', {})
@@ -838,14 +900,39 @@ class AdvancedMatchingService:
             logger.error(f"Error calculating field similarity: {str(e)}")
             return 0
 
+    @timed_stage("match_image")
     def calculate_image_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> float:
         try:
+            # Near-duplicate photos of the same object: a few XORs settle it
+            hashes1 = item1.get('aiMetadata', {}).get('perceptualHashes', [])
+            hashes2 = item2.get('aiMetadata', {}).get('perceptualHashes', [])
+            if hashes1 and hashes2:
+                distance = min(hamming_distance(h1, h2) for h1 in hashes1 for h2 in hashes2)
+                if distance <= self.duplicate_hash_distance:
+                    return 1.0 - distance / HASH_BITS
+
+            # Prefer real visual embeddings: they are L2-normalized, so similarity is a dot product
+            visual1 = item1.get('aiMetadata', {}).get('visualEmbedding', [])
+            visual2 = item2.get('aiMetadata', {}).get('visualEmbedding', [])
+            model1 = item1.get('aiMetadata', {}).get('visualEmbeddingModel')
+            model2 = item2.get('aiMetadata', {}).get('visualEmbeddingModel')
+
+            if visual1 and visual2 and model1 and model1 == model2 and len(visual1) == len(visual2):
+                similarity = float(np.dot(np.asarray(visual1, dtype=np.float32), np.asarray(visual2, dtype=np.float32)))
+                return max(0, min(1.0, similarity))
+
             features1 = item1.get('aiMetadata', {}).get('imageFeatures', [])
             features2 = item2.get('aiMetadata', {}).get('imageFeatures', [])
 
             if not features1 or not features2 or len(features1) != len(features2):
                 return 0
 
+            # Vectors from different encoders (or legacy per-process hash()) are not comparable
+            version1 = item1.get('aiMetadata', {}).get('imageFeaturesVersion')
+            version2 = item2.get('aiMetadata', {}).get('imageFeaturesVersion')
+            if not version1 or version1 != version2:
+                return 0
+
             # Cosine similarity between image features
             features1 = np.array(features1).reshape(1, -1)
             features2 = np.array(features2).reshape(1, -1)
@@ -857,6 +944,7 @@ class AdvancedMatchingService:
             logger.error(f"Error calculating image similarity: {str(e)}")
             return 0
 
+    @timed_stage("match_category")
     def calculate_enhanced_category_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> float:
         try:
             cat1 = item1.get('category', '').lower()
@@ -893,6 +981,7 @@ class AdvancedMatchingService:
             logger.error(f"Error calculating enhanced category similarity: {str(e)}")
             return 0
 
+    @timed_stage("match_location_time")
     def calculate_location_time_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> float:
         try:
             # Location similarity
@@ -987,6 +1076,7 @@ class AdvancedMatchingService:
             logger.error(f"Error calculating enhanced temporal similarity: {str(e)}")
             return 0
 
+    @timed_stage("match_keywords")
     async def calculate_advanced_keyword_similarity(self, item1: Dict[str, Any], item2: Dict[str, Any]) -> float:
         try:
             # Extract keywords from text analysis
@@ -0,0 +1,130 @@
+import os
+import numpy as np
+from typing import Any, Dict, List
+
+# Reference palette used for naming (same names the matcher already understands)
+REFERENCE_COLORS = {
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+    'red': (255, 0, 0),
+    'green': (0, 255, 0),
+    'blue': (0, 0, 255),
+    'yellow': (255, 255, 0),
+    'cyan': (0, 255, 255),
+    'magenta': (255, 0, 255),
+    'brown': (165, 42, 42),
+    'orange': (255, 165, 0),
+    'pink': (255, 192, 203),
+    'purple': (128, 0, 128),
+    'gray': (128, 128, 128),
+    'silver': (192, 192, 192),
+}
+COLOR_NAMES = list(REFERENCE_COLORS)
+
+# 4 bits per channel -> 16x16x16 = 4096 histogram bins
+QUANT_BITS = 4
+QUANT_LEVELS = 1 << QUANT_BITS
+SHIFT = 8 - QUANT_BITS
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Convert an (n, 3) array of sRGB values in 0-255 to CIE Lab (D65)"""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+
+    xyz = linear @ np.array([
+        [0.4124564, 0.2126729, 0.0193339],
+        [0.3575761, 0.7151522, 0.1191920],
+        [0.1804375, 0.0721750, 0.9503041],
+    ])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([
+        116 * f[:, 1] - 16,
+        500 * (f[:, 0] - f[:, 1]),
+        200 * (f[:, 1] - f[:, 2])
+    ], axis=1)
+
+
+def _nearest_reference(lab: np.ndarray) -> np.ndarray:
+    reference_lab = rgb_to_lab(np.array(list(REFERENCE_COLORS.values())))
+    distances = ((lab[:, None, :] - reference_lab[None, :, :]) ** 2).sum(axis=2)
+    return distances.argmin(axis=1)
+
+
+def _build_lookup_table() -> np.ndarray:
+    """Color-name index for the center of every histogram bin, computed once at import"""
+    levels = (np.arange(QUANT_LEVELS) << SHIFT) + (1 << (SHIFT - 1))
+    r, g, b = np.meshgrid(levels, levels, levels, indexing='ij')
+    centers = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+    return _nearest_reference(rgb_to_lab(centers)).astype(np.intp)
+
+
+BIN_TO_COLOR = _build_lookup_table()
+
+
+def rgb_to_color_name(rgb) -> str:
+    """Name of the perceptually closest reference color"""
+    lab = rgb_to_lab(np.asarray(rgb, dtype=np.float64).reshape(1, 3))
+    return COLOR_NAMES[_nearest_reference(lab)[0]]
+
+
+def _quantize(pixels: np.ndarray) -> np.ndarray:
+    """Histogram bin index for every pixel of an (n, 3) uint8 RGB array"""
+    q = (pixels >> SHIFT).astype(np.intp)
+    return (q[:, 0] << (2 * QUANT_BITS)) | (q[:, 1] << QUANT_BITS) | q[:, 2]
+
+
+def _format_colors(coverage: np.ndarray, min_percentage: float, top: int) -> List[Dict[str, Any]]:
+    order = np.argsort(-coverage)
+    return [
+        {"color": COLOR_NAMES[i], "percentage": round(float(coverage[i]), 1)}
+        for i in order[:top]
+        if coverage[i] > min_percentage
+    ]
+
+
+def dominant_colors(pixels: np.ndarray, min_percentage: float = 5, top: int = 3) -> List[Dict[str, Any]]:
+    """
+    Dominant named colors of an (n, 3) uint8 RGB pixel array: one vectorized pass
+    into a coarse 3D histogram, then bins are mapped to names via the lookup table.
+    """
+    bin_counts = np.bincount(_quantize(pixels), minlength=QUANT_LEVELS ** 3)
+    color_counts = np.bincount(BIN_TO_COLOR, weights=bin_counts, minlength=len(COLOR_NAMES))
+    return _format_colors(color_counts / max(len(pixels), 1) * 100, min_percentage, top)
+
+
+def dominant_colors_refined(pixels: np.ndarray, n_clusters: int = 5, min_percentage: float = 5, top: int = 3) -> List[Dict[str, Any]]:
+    """
+    Histogram-seeded mini-batch KMeans: the most populated bins initialize the
+    clusters so a single cheap run converges, and centers are named in Lab.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    bin_counts = np.bincount(_quantize(pixels), minlength=QUANT_LEVELS ** 3)
+    seeds = np.argsort(-bin_counts)[:n_clusters]
+    seeds = seeds[bin_counts[seeds] > 0]
+    init = np.stack([
+        (seeds >> (2 * QUANT_BITS)) & (QUANT_LEVELS - 1),
+        (seeds >> QUANT_BITS) & (QUANT_LEVELS - 1),
+        seeds & (QUANT_LEVELS - 1)
+    ], axis=1).astype(np.float64) * (1 << SHIFT) + (1 << (SHIFT - 1))
+
+    kmeans = MiniBatchKMeans(n_clusters=len(init), init=init, n_init=1, batch_size=2048, random_state=42)
+    labels = kmeans.fit_predict(pixels.astype(np.float64))
+
+    center_names = _nearest_reference(rgb_to_lab(kmeans.cluster_centers_))
+    cluster_counts = np.bincount(labels, minlength=len(init))
+    color_counts = np.bincount(center_names, weights=cluster_counts, minlength=len(COLOR_NAMES))
+    return _format_colors(color_counts / max(len(pixels), 1) * 100, min_percentage, top)
+
+
+def analyze_colors(pixels: np.ndarray) -> List[Dict[str, Any]]:
+    """Dominant colors using the engine selected by COLOR_ENGINE (histogram or minibatch)"""
+    if os.getenv("COLOR_ENGINE", "histogram").lower() == "minibatch":
+        try:
+            return dominant_colors_refined(pixels)
+        except ImportError:
+            pass
+    return dominant_colors(pixels)
@@ -0,0 +1,99 @@
+import os
+import hashlib
+import numpy as np
+from typing import Optional
+from utils.logger import logger
+
+METHODS = ('pca', 'random')
+
+
+def projection_path() -> str:
+    return os.getenv("EMBEDDING_PROJECTION_PATH", os.path.join("data", "embedding_projection.npz"))
+
+
+def projection_enabled() -> bool:
+    return os.getenv("MATCHING_USE_PROJECTION", "false").lower() == "true"
+
+
+class EmbeddingProjector:
+    """
+    Linear projection of full text embeddings (384-d) down to 64-128 dims for
+    first-stage retrieval. Outputs are L2-normalized so similarity is a dot product.
+    """
+
+    def __init__(self, method: str, mean: np.ndarray, components: np.ndarray):
+        self.method = method
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)
+        digest = hashlib.sha1(self.components.tobytes() + self.mean.tobytes()).hexdigest()[:8]
+        self.version = f"{method}{self.dim}-{digest}"
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, method: str = 'pca', dim: int = 96, seed: int = 42) -> 'EmbeddingProjector':
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if method not in METHODS:
+            raise ValueError(f"Unknown projection method: {method}")
+
+        if method == 'pca':
+            if len(embeddings) < dim:
+                raise ValueError(f"PCA to {dim} dims needs at least {dim} embeddings, got {len(embeddings)}")
+            mean = embeddings.mean(axis=0)
+            # Rows of vt are the principal axes, sorted by explained variance
+            _, _, vt = np.linalg.svd(embeddings - mean, full_matrices=False)
+            components = vt[:dim]
+        else:
+            rng = np.random.default_rng(seed)
+            mean = np.zeros(embeddings.shape[1], dtype=np.float32)
+            components = rng.standard_normal((dim, embeddings.shape[1])) / np.sqrt(dim)
+
+        return cls(method, mean, components)
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        single = embeddings.ndim == 1
+        if single:
+            embeddings = embeddings[None, :]
+
+        reduced = (embeddings - self.mean) @ self.components.T
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        reduced = reduced / np.clip(norms, 1e-12, None)
+        return reduced[0] if single else reduced
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Write then rename so a refresh never leaves a half-written file behind
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, method=self.method, mean=self.mean, components=self.components)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'EmbeddingProjector':
+        data = np.load(path)
+        return cls(str(data['method']), data['mean'], data['components'])
+
+
+def load_projector() -> Optional[EmbeddingProjector]:
+    """Load the configured projection if enabled and present, otherwise None"""
+    if not projection_enabled():
+        return None
+
+    path = projection_path()
+    if not os.path.exists(path):
+        logger.warning(f"Embedding projection enabled but {path} not found - run 'python -m scripts.fit_projection'")
+        return None
+
+    try:
+        projector = EmbeddingProjector.load(path)
+        logger.info(f"Loaded embedding projection {projector.version} ({projector.input_dim} -> {projector.dim} dims)")
+        return projector
+    except Exception as e:
+        logger.error(f"Failed to load embedding projection from {path}: {str(e)}")
+        return None
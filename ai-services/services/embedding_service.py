@@ -1,17 +1,22 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from typing import Dict, List, Any
 from utils.logger import logger
+from utils.metrics import stage_timer
+from utils.feature_hashing import encode_image_analysis, IMAGE_FEATURES_VERSION
+from .text_encoder import load_text_encoder
+from .embedding_projection import load_projector
 
 class EmbeddingService:
     def __init__(self):
         self.text_model = None
+        self.projector = None
         self.ready = False
 
     async def initialize(self):
         try:
             # Initialize sentence transformer for text embeddings
-            self.text_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.text_model = load_text_encoder()
+            self.projector = load_projector()
             self.ready = True
             logger.info("Embedding service initialized successfully")
             
@@ -26,14 +31,16 @@ class EmbeddingService:
         try:
             result = {
                 "textEmbedding": [],
-                "imageFeatures": []
+                "imageFeatures": [],
+                "imageFeaturesVersion": IMAGE_FEATURES_VERSION
             }
 
             # Generate text embedding
             if request.text:
                 text_content = self._prepare_text_content(request.text)
-                text_embedding = self.text_model.encode(text_content)
-                result["textEmbedding"] = text_embedding.tolist()
+                with stage_timer("text_encode"):
+                    text_embedding = self.text_model.encode(text_content)
+                result.update(self._text_embedding_fields(text_embedding))
             else:
                 result["textEmbedding"] = [0.0] * 384
 
@@ -41,6 +48,13 @@ class EmbeddingService:
             if request.images:
                 image_features = self._generate_image_features(request.images)
                 result["imageFeatures"] = image_features
+
+                # Pass through the visual embedding computed at ingestion time
+                if request.images.get('visual_embedding'):
+                    result["visualEmbedding"] = request.images['visual_embedding']
+                    result["visualEmbeddingModel"] = request.images.get('visual_embedding_model')
+                if request.images.get('perceptual_hashes'):
+                    result["perceptualHashes"] = request.images['perceptual_hashes']
             else:
                 result["imageFeatures"] = [0.0] * 100
 
@@ -50,9 +64,18 @@ class EmbeddingService:
             logger.error(f"Embedding generation failed: {str(e)}")
             return {
                 "textEmbedding": [0.0] * 384,
-                "imageFeatures": [0.0] * 100
+                "imageFeatures": [0.0] * 100,
+                "imageFeaturesVersion": IMAGE_FEATURES_VERSION
             }
 
+    def _text_embedding_fields(self, text_embedding: np.ndarray) -> Dict[str, Any]:
+        fields = {"textEmbedding": text_embedding.tolist()}
+        # Reduced vector for first-stage retrieval; full vector is kept for reranking
+        if self.projector is not None:
+            fields["textEmbeddingReduced"] = self.projector.transform(text_embedding).tolist()
+            fields["projectionVersion"] = self.projector.version
+        return fields
+
     def _prepare_text_content(self, text_analysis: Dict[str, Any]) -> str:
         # Combine different text elements for embedding
         content_parts = []
@@ -81,46 +104,15 @@ class EmbeddingService:
         return ' '.join(content_parts)
 
     def _generate_image_features(self, image_analysis: Dict[str, Any]) -> List[float]:
-        # Generate features from image analysis results
-        features = [0.0] * 100
-        
+        # Stable signed feature hashing of colors, objects and Gemini tags so the
+        # vectors are identical across workers and restarts
         try:
-            # Color-based features
-            if 'colors' in image_analysis and image_analysis['colors']:
-                for i, color_info in enumerate(image_analysis['colors'][:5]):  # Top 5 colors
-                    base_idx = i * 10
-                    if base_idx + 1 < len(features):
-                        # Encode color percentage
-                        features[base_idx] = color_info.get('percentage', 0) / 100.0
-                        
-                        # Encode color type (simple hash-based encoding)
-                        color_name = color_info.get('color', '')
-                        color_hash = hash(color_name) % 1000 / 1000.0
-                        features[base_idx + 1] = color_hash
-
-            # Object-based features
-            if 'objects' in image_analysis and image_analysis['objects']:
-                for i, obj in enumerate(image_analysis['objects'][:10]):  # Top 10 objects
-                    idx = 50 + i  # Start from index 50
-                    if idx < len(features):
-                        # Simple encoding based on object name hash
-                        obj_hash = hash(obj) % 1000 / 1000.0
-                        features[idx] = obj_hash
-
-            # Gemini tags features
-            if 'gemini_tags' in image_analysis and image_analysis['gemini_tags']:
-                for i, tag in enumerate(image_analysis['gemini_tags'][:20]):  # Top 20 tags
-                    idx = 70 + i  # Start from index 70
-                    if idx < len(features):
-                        tag_hash = hash(tag) % 1000 / 1000.0
-                        features[idx] = tag_hash
-
+            return encode_image_analysis(image_analysis).tolist()
         except Exception as e:
             logger.error(f"Error generating image features: {str(e)}")
+            return [0.0] * 100
 
-        return features
-
-
+    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         try:
             if len(embedding1) != len(embedding2):
                 return 0.0
@@ -140,28 +132,32 @@ class EmbeddingService:
             logger.error(f"Similarity calculation failed: {str(e)}")
             return 0.0
 
-
+    async def batch_generate_embeddings(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         results = []
         
         for item in items:
             try:
                 # Prepare text content
                 text_content = f"{item.get('title', '')} {item.get('description', '')}"
-                text_embedding = self.text_model.encode(text_content)
+                with stage_timer("text_encode"):
+                    text_embedding = self.text_model.encode(text_content)
                 
-                # Generate image features (placeholder - would need actual image processing)
-                image_features = [0.0] * 100
+                # Hash the stored image analysis the same way generate_embeddings does
+                image_analysis = (item.get('aiMetadata') or {}).get('imageAnalysis') or item.get('imageAnalysis')
+                image_features = self._generate_image_features(image_analysis) if image_analysis else [0.0] * 100
                 
                 results.append({
-                    "textEmbedding": text_embedding.tolist(),
-                    "imageFeatures": image_features
+                    **self._text_embedding_fields(text_embedding),
+                    "imageFeatures": image_features,
+                    "imageFeaturesVersion": IMAGE_FEATURES_VERSION
                 })
                 
             except Exception as e:
                 logger.error(f"Failed to generate embeddings for item {item.get('_id', 'unknown')}: {str(e)}")
                 results.append({
                     "textEmbedding": [0.0] * 384,
-                    "imageFeatures": [0.0] * 100
+                    "imageFeatures": [0.0] * 100,
+                    "imageFeaturesVersion": IMAGE_FEATURES_VERSION
                 })
         
         return results
\ No newline at end of file
@@ -0,0 +1,267 @@
+import os
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+from typing import Any, Dict, List, Union
+from utils.logger import logger
+from utils.metrics import stage_timer
+from utils.tracing import span
+from utils.assets import is_offline, model_dir, resolve_model, timed_load
+
+DEFAULT_MODEL = 'cardiffnlp/twitter-roberta-base-emotion'
+
+# torch: PyTorch fp32 pipeline, int8: dynamic-int8 quantized torch,
+# onnx: ONNX Runtime fp32 graph, onnx_int8: ONNX Runtime with int8 weights
+BACKENDS = ('torch', 'int8', 'onnx', 'onnx_int8')
+
+# on: always classify, auto: only when the LLM did not supply emotional_tone, off: never load the model
+MODES = ('on', 'auto', 'off')
+
+# Classifier label -> emotional tone reported with the analysis
+EMOTION_TONES = {
+    'joy': 'hopeful',
+    'optimism': 'hopeful',
+    'anger': 'frustrated',
+    'sadness': 'worried',
+    'fear': 'worried',
+    'surprise': 'surprised',
+    'disgust': 'frustrated',
+    'trust': 'calm'
+}
+
+Scores = List[Dict[str, Any]]
+
+
+def get_mode() -> str:
+    mode = os.getenv("EMOTION_CLASSIFIER", "on").lower()
+    if mode not in MODES:
+        logger.warning(f"Unknown EMOTION_CLASSIFIER '{mode}', using on")
+        return 'on'
+    return mode
+
+
+def get_backend() -> str:
+    backend = os.getenv("EMOTION_BACKEND", "torch").lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown EMOTION_BACKEND '{backend}', using torch")
+        return 'torch'
+    return backend
+
+
+def tone_for(scores: Scores) -> str:
+    top = max(scores, key=lambda x: x['score'])
+    return EMOTION_TONES.get(top['label'], 'concerned')
+
+
+def onnx_paths(model_name: str = DEFAULT_MODEL):
+    """Locations of the exported fp32 and int8 ONNX graphs inside the asset bundle"""
+    base = model_dir('onnx', model_name)
+    return os.path.join(base, 'model.onnx'), os.path.join(base, 'model_int8.onnx')
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL) -> str:
+    """Export the sequence classifier to ONNX (plus an int8 copy), with its tokenizer and labels"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    source = resolve_model('transformers', model_name)
+    fp32_path, int8_path = onnx_paths(model_name)
+    os.makedirs(os.path.dirname(fp32_path), exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModelForSequenceClassification.from_pretrained(source)
+    model.eval()
+
+    sample = tokenizer(["lost my black wallet near the library"], return_tensors='pt')
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    tokenizer.save_pretrained(os.path.dirname(fp32_path))
+    model.config.save_pretrained(os.path.dirname(fp32_path))
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    logger.info(f"Exported ONNX emotion model to {os.path.dirname(fp32_path)}")
+    return fp32_path
+
+
+class TorchEmotionModel:
+    """transformers text-classification pipeline returning every label's score"""
+
+    def __init__(self, model_name: str, quantized: bool = False):
+        from transformers import pipeline
+
+        self.pipeline = pipeline(
+            "text-classification",
+            model=resolve_model('transformers', model_name),
+            return_all_scores=True
+        )
+        if quantized:
+            import torch
+            self.pipeline.model = torch.quantization.quantize_dynamic(
+                self.pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+    def __call__(self, texts: List[str], batch_size: int, max_length: int) -> List[Scores]:
+        return self.pipeline(texts, batch_size=batch_size, truncation=True, max_length=max_length)
+
+
+class OnnxEmotionModel:
+    """ONNX Runtime classifier with the pipeline's output format (softmax over all labels)"""
+
+    def __init__(self, model_path: str):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("EMOTION_THREADS", 0))
+        if threads:
+            options.intra_op_num_threads = threads
+
+        model_dir_path = os.path.dirname(model_path)
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir_path)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        id2label = AutoConfig.from_pretrained(model_dir_path).id2label
+        self.labels = [id2label[i] for i in range(len(id2label))]
+
+    def __call__(self, texts: List[str], batch_size: int, max_length: int) -> List[Scores]:
+        results = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors='np'
+            )
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(None, feeds)[0]
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities = exp / exp.sum(axis=1, keepdims=True)
+            for row in probabilities:
+                results.append([{'label': label, 'score': float(score)} for label, score in zip(self.labels, row)])
+        return results
+
+
+class EmotionClassifier:
+    """
+    Callable with the transformers pipeline's output format (one list of label
+    scores per text). A list input runs as one batched call. Single texts from
+    concurrent requests are micro-batched: a worker thread drains every text
+    queued while the previous batch ran (waiting up to EMOTION_BATCH_WAIT_MS
+    for more) and classifies them in one forward pass.
+    """
+
+    def __init__(self, model, max_length: int = 128, batch_size: int = 16, batch_wait_ms: float = 0):
+        self.model = model
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+        self._model_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self.stats = {"texts": 0, "batches": 0, "micro_batches": 0}
+
+    def __call__(self, inputs: Union[str, List[str]], batch_size: int = None) -> List[Scores]:
+        if isinstance(inputs, str):
+            return [self._submit(inputs)]
+        return self._run(list(inputs), batch_size or self.batch_size)
+
+    def _run(self, texts: List[str], batch_size: int) -> List[Scores]:
+        # One forward pass at a time; parallel calls would only fight over the same cores
+        with self._model_lock, stage_timer("emotion_classifier"):
+            outputs = self.model(texts, batch_size=batch_size, max_length=self.max_length)
+        self.stats["texts"] += len(texts)
+        self.stats["batches"] += 1
+        return outputs
+
+    def _submit(self, text: str) -> Scores:
+        future: Future = Future()
+        self._queue.put((text, future))
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._batch_loop, name="emotion-batcher", daemon=True)
+                    self._worker.start()
+        # The batcher thread has no request context; this span covers queueing plus the shared pass
+        with span("emotion_classifier_wait"):
+            return future.result()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    remaining = deadline - time.monotonic()
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                outputs = self._run([text for text, _ in batch], self.batch_size)
+                self.stats["micro_batches"] += 1
+                for (_, future), scores in zip(batch, outputs):
+                    future.set_result(scores)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["texts"] / self.stats["batches"], 2) if self.stats["batches"] else 0.0,
+            "queued": self._queue.qsize(),
+            "max_length": self.max_length
+        }
+
+
+def _load_onnx(model_name: str, quantized: bool) -> OnnxEmotionModel:
+    fp32_path, int8_path = onnx_paths(model_name)
+    if not os.path.exists(fp32_path):
+        if is_offline():
+            raise RuntimeError(
+                f"ONNX model not found in {os.path.dirname(fp32_path)} - "
+                f"run 'python -m scripts.fetch_assets --onnx' on a connected machine"
+            )
+        export_onnx(model_name)
+    return OnnxEmotionModel(int8_path if quantized else fp32_path)
+
+
+def load_emotion_classifier(model_name: str = DEFAULT_MODEL, backend: str = None) -> EmotionClassifier:
+    """Load the emotion model with the configured inference backend, wrapped for batching"""
+    backend = backend or get_backend()
+
+    with timed_load(f"{model_name} ({backend})"):
+        model = None
+        try:
+            if backend == 'int8':
+                model = TorchEmotionModel(model_name, quantized=True)
+            elif backend in ('onnx', 'onnx_int8'):
+                model = _load_onnx(model_name, quantized=backend == 'onnx_int8')
+        except ImportError as e:
+            logger.warning(f"Emotion backend '{backend}' unavailable ({str(e)}), using torch")
+
+        return EmotionClassifier(
+            model or TorchEmotionModel(model_name),
+            max_length=int(os.getenv("EMOTION_MAX_LENGTH", 128)),
+            batch_size=int(os.getenv("EMOTION_BATCH_SIZE", 16)),
+            batch_wait_ms=float(os.getenv("EMOTION_BATCH_WAIT_MS", 0))
+        )
@@ -1,53 +1,155 @@
-import re
 import json
-import nltk
+from functools import lru_cache
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.sentiment import SentimentIntensityAnalyzer
-import google.generativeai as genai
-import openai
-from transformers import pipeline
-from sentence_transformers import SentenceTransformer
 import asyncio
+import numpy as np
 from typing import Dict, List, Any, Optional
 import os
 from utils.logger import logger
+from utils.assets import ensure_nltk_resources, timed_load
+from utils.metrics import stage_timer, timed_stage
+from .text_encoder import load_text_encoder
+from .llm_client import LLMClient, LLMError
+from .text_analysis_cache import TextAnalysisCache
+from .emotion_classifier import EMOTION_TONES, get_mode as get_emotion_mode, load_emotion_classifier
+from .text_patterns import (
+    TEXT_MATCHER, CATEGORY_KEYWORDS, PREPOSITION_PHRASE_PATTERN, NUMBER_PATTERN,
+    PHONE_PATTERN, EMAIL_PATTERN
+)
+
+# Fields requested from Gemini for every description (single and batched prompts)
+ANALYSIS_FIELDS = """{
+                "keywords": ["list of 5-10 most important keywords"],
+                "sentiment": "positive/negative/neutral",
+                "category": "inferred category (electronics/accessories/clothing/etc)",
+                "urgency_level": "low/medium/high",
+                "location_mentioned": "true/false",
+                "brand_mentioned": "brand name or false",
+                "color_mentioned": "color name or false", 
+                "size_mentioned": "true/false",
+                "condition_mentioned": "true/false",
+                "emotional_tone": "worried/hopeful/frustrated/calm/desperate/relieved",
+                "has_contact_info": "true/false",
+                "insights": {
+                    "item_value": "low/medium/high",
+                    "owner_attachment": "low/medium/high",
+                    "description_quality": "poor/good/excellent",
+                    "specificity": "vague/moderate/detailed"
+                }
+            }"""
+
+@lru_cache(maxsize=1)
+def get_stop_words() -> frozenset:
+    """English stopwords, loaded once (after NLTK data has been ensured)"""
+    return frozenset(stopwords.words('english'))
+
+class TextContext:
+    """
+    Intermediate results for one description (tokens, sentences, emotion scores),
+    computed on first use and shared by every stage of the request.
+    """
+
+    def __init__(self, description: str, emotion_classifier=None):
+        self.description = description
+        self.lower = description.lower()
+        self._emotion_classifier = emotion_classifier
+        self._tokens = None
+        self._sentences = None
+        self._emotions = None
+        self._matches = None
+
+    @property
+    def matches(self) -> Dict[str, List[str]]:
+        """Every dictionary hit (category, brand, color, ...) from one scan of the text"""
+        if self._matches is None:
+            self._matches = TEXT_MATCHER.scan(self.lower)
+        return self._matches
+
+    @property
+    def tokens(self) -> List[str]:
+        if self._tokens is None:
+            self._tokens = word_tokenize(self.lower)
+        return self._tokens
+
+    @property
+    def sentences(self) -> List[str]:
+        if self._sentences is None:
+            self._sentences = sent_tokenize(self.description)
+        return self._sentences
+
+    @property
+    def has_classifier(self) -> bool:
+        return self._emotion_classifier is not None
+
+    def attach_classifier(self, emotion_classifier):
+        """Enable emotion scores after the fact (auto mode, once the LLM has answered)"""
+        self._emotion_classifier = emotion_classifier
+
+    @property
+    def emotions(self) -> List[Dict[str, Any]]:
+        """All emotion label scores; the classifier runs at most once per request"""
+        if self._emotions is None:
+            if self._emotion_classifier is None:
+                raise RuntimeError("Emotion classifier not available")
+            self._emotions = self._emotion_classifier(self.description)[0]
+        return self._emotions
+
+    @property
+    def top_emotion(self) -> Dict[str, Any]:
+        return max(self.emotions, key=lambda x: x['score'])
+
+    @staticmethod
+    def classify_batch(contexts: List['TextContext'], classifier, batch_size: int = 16):
+        """Fill in the emotion scores of many contexts with one batched classifier call"""
+        pending = [context for context in contexts if context._emotions is None]
+        if not pending or classifier is None:
+            return
+        outputs = classifier([context.description for context in pending], batch_size=batch_size)
+        for context, emotions in zip(pending, outputs):
+            context._emotions = emotions
 
 class EnhancedTextAnalyzer:
-    def __init__(self):
+    def __init__(self, llm_client: LLMClient = None):
         self.sentiment_analyzer = None
         self.embedding_model = None
-        self.gemini_model = None
-        self.openai_client = None
+        self.llm_client = llm_client or LLMClient()
         self.emotion_classifier = None
+        self.emotion_mode = get_emotion_mode()
+        self.analysis_cache = None
+        # Bulk analysis: texts per emotion model forward pass, descriptions per Gemini prompt
+        self.batch_model_size = int(os.getenv("TEXT_BATCH_MODEL_SIZE", 16))
+        self.batch_llm_size = int(os.getenv("TEXT_BATCH_LLM_SIZE", 10))
+        # TEXT_ANALYSIS_MODE=tiered only asks Gemini when the rule-based fields are not enough
+        self.analysis_mode = os.getenv("TEXT_ANALYSIS_MODE", "full").lower()
+        self.tier_min_confidence = float(os.getenv("TEXT_TIER_MIN_CONFIDENCE", 0.7))
+        self.tier_required_fields = [
+            field.strip() for field in os.getenv("TEXT_TIER_REQUIRED_FIELDS", "category").split(",") if field.strip()
+        ]
         self.ready = False
 
     async def initialize(self):
         try:
-            # Download required NLTK data
-           
-            nltk.download('stopwords', quiet=True)
-            nltk.download('vader_lexicon', quiet=True)
+            # Make sure required NLTK data is available (local bundle first)
+            ensure_nltk_resources()
             
             # Initialize models
-            self.sentiment_analyzer = SentimentIntensityAnalyzer()
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            # Initialize Gemini AI
-            if os.getenv("GEMINI_API_KEY"):
-                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-                self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+            with timed_load('vader_lexicon'):
+                self.sentiment_analyzer = SentimentIntensityAnalyzer()
+            self.embedding_model = load_text_encoder()
             
-            # Initialize OpenAI
-            if os.getenv("OPENAI_API_KEY"):
-                self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            # Initialize the LLM providers (shared client; no-op if already configured)
+            self.llm_client.initialize()
+            if os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true":
+                # Results depend on the provider, so each one gets its own key space
+                self.analysis_cache = TextAnalysisCache(namespace=self.llm_client.provider_name)
             
-            # Initialize emotion classification pipeline
-            self.emotion_classifier = pipeline(
-                "text-classification",
-                model="cardiffnlp/twitter-roberta-base-emotion",
-                return_all_scores=True
-            )
+            # Initialize emotion classification (batched, optionally quantized or ONNX)
+            if self.emotion_mode != 'off':
+                self.emotion_classifier = load_emotion_classifier()
+            else:
+                logger.info("Emotion classifier disabled (EMOTION_CLASSIFIER=off)")
             
             self.ready = True
             logger.info("Enhanced text analyzer initialized successfully")
@@ -59,6 +161,10 @@ class EnhancedTextAnalyzer:
     def is_ready(self) -> bool:
         return self.ready
 
+    def shutdown(self):
+        if self.analysis_cache:
+            self.analysis_cache.flush()
+
     async def analyze(self, description: str) -> Dict[str, Any]:
         """
         Enhanced text analysis using Gemini AI and advanced NLP
@@ -68,25 +174,22 @@ class EnhancedTextAnalyzer:
 
         try:
             logger.info("Starting enhanced text analysis with Gemini AI")
+            context = TextContext(description, self._context_classifier())
+            escalate = self._needs_llm(context)
             
-            # Step 1: Get comprehensive analysis from Gemini AI
-            gemini_analysis = await self._analyze_with_gemini(description)
-            
-            # Step 2: Perform detailed NLP analysis
-            nlp_analysis = await self._perform_nlp_analysis(description)
+            # Steps 1 and 2 overlap: the Gemini round trip runs while local NLP and
+            # the rule-based fields are computed on a worker thread
+            gemini_analysis, (nlp_analysis, local_fields) = await asyncio.gather(
+                self._analyze_with_gemini(description, context) if escalate else asyncio.sleep(0, result={}),
+                asyncio.to_thread(self._run_local_analysis, context)
+            )
             
-            # Step 3: Extract specific fields
-            field_analysis = await self._extract_specific_fields(description, gemini_analysis)
+            if self.emotion_mode == 'auto':
+                await asyncio.to_thread(self._fill_missing_emotions, [context], [gemini_analysis], [nlp_analysis], [local_fields])
             
-            # Step 4: Combine all analyses
-            combined_analysis = {
-                **field_analysis,
-                **nlp_analysis,
-                'text_length': len(description),
-                'word_count': len(description.split()),
-                'gemini_insights': gemini_analysis.get('insights', {}),
-                'confidence_score': self._calculate_analysis_confidence(field_analysis, nlp_analysis)
-            }
+            # Steps 3 and 4: Extract specific fields and combine all analyses
+            combined_analysis = self._combine_analysis(description, gemini_analysis, nlp_analysis, local_fields)
+            combined_analysis['analysis_tier'] = self._analysis_tier(escalate, gemini_analysis)
             
             logger.info("Enhanced text analysis completed successfully")
             return combined_analysis
@@ -95,122 +198,362 @@ class EnhancedTextAnalyzer:
             logger.error(f"Enhanced text analysis failed: {str(e)}")
             return self._get_fallback_analysis(description)
 
-    async def _analyze_with_gemini(self, description: str) -> Dict[str, Any]:
+    async def analyze_batch(self, descriptions: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze many descriptions at once (backfills, imports). Local models run
+        batched on one worker thread while the descriptions go to Gemini several
+        per prompt. Results are in input order, one per description.
+        """
+        if not self.ready:
+            raise Exception("Enhanced text analyzer not initialized")
+
+        logger.info(f"Starting batch text analysis of {len(descriptions)} descriptions")
+        contexts = [TextContext(description, self._context_classifier()) for description in descriptions]
+        escalated = [index for index, context in enumerate(contexts) if self._needs_llm(context)]
+        escalated_results, local_results = await asyncio.gather(
+            self._analyze_batch_with_gemini([contexts[index] for index in escalated]),
+            asyncio.to_thread(self._run_local_batch, contexts)
+        )
+        gemini_results: List[Dict[str, Any]] = [{} for _ in contexts]
+        for index, analysis in zip(escalated, escalated_results):
+            gemini_results[index] = analysis
+        escalated = set(escalated)
+        if self.emotion_mode == 'auto':
+            await asyncio.to_thread(
+                self._fill_missing_emotions,
+                contexts,
+                gemini_results,
+                [nlp_analysis for nlp_analysis, _ in local_results],
+                [local_fields for _, local_fields in local_results]
+            )
+
+        results = []
+        for index, (context, gemini_analysis, (nlp_analysis, local_fields)) in enumerate(zip(contexts, gemini_results, local_results)):
+            try:
+                combined_analysis = self._combine_analysis(context.description, gemini_analysis, nlp_analysis, local_fields)
+                combined_analysis['analysis_tier'] = self._analysis_tier(index in escalated, gemini_analysis)
+                results.append(combined_analysis)
+            except Exception as e:
+                logger.error(f"Batch text analysis failed for one description: {str(e)}")
+                results.append(self._get_fallback_analysis(context.description))
+        return results
+
+    def _context_classifier(self):
+        """Classifier used up front: only in 'on' mode; 'auto' waits for the LLM's answer"""
+        return self.emotion_classifier if self.emotion_mode == 'on' else None
+
+    def _fill_missing_emotions(self, contexts: List[TextContext], gemini_results: List[Dict],
+                               nlp_results: List[Dict], local_results: List[Dict]):
+        """Auto mode: classify only the descriptions whose LLM answer has no emotional tone"""
+        missing = [index for index, gemini_analysis in enumerate(gemini_results) if not gemini_analysis.get('emotional_tone')]
+        if not missing or self.emotion_classifier is None:
+            return
+        for index in missing:
+            contexts[index].attach_classifier(self.emotion_classifier)
+        if len(missing) > 1:
+            try:
+                TextContext.classify_batch([contexts[index] for index in missing], self.emotion_classifier, self.batch_model_size)
+            except Exception as e:
+                logger.error(f"Batched emotion classification failed: {str(e)}")
+
+        for index in missing:
+            try:
+                nlp_results[index]['emotion_confidence'] = contexts[index].top_emotion['score']
+            except Exception as e:
+                logger.error(f"Emotion classification failed: {str(e)}")
+            local_results[index]['emotional_tone'] = self._analyze_emotion_tone(contexts[index])
+
+    def _needs_llm(self, context: TextContext) -> bool:
+        """
+        Tiered mode: escalate to Gemini only when the rule-based confidence is
+        below the bar or a required field could not be extracted locally
+        """
+        if self.analysis_mode != "tiered":
+            return True
+        basic = self._get_basic_analysis(context.description, context)
+        if self._calculate_analysis_confidence(basic, {}) < self.tier_min_confidence:
+            return True
+        return any(basic.get(field) in (None, 'other', 'false') for field in self.tier_required_fields)
+
+    def _analysis_tier(self, escalated: bool, gemini_analysis: Dict) -> str:
+        """Which tier answered: local rules, the LLM, or local rules after a failed escalation"""
+        if not escalated:
+            return 'local'
+        return 'llm' if gemini_analysis else 'local_fallback'
+
+    def _combine_analysis(self, description: str, gemini_analysis: Dict, nlp_analysis: Dict, local_fields: Dict) -> Dict[str, Any]:
+        field_analysis = self._extract_specific_fields(gemini_analysis, local_fields)
+        return {
+            **field_analysis,
+            **nlp_analysis,
+            'text_length': len(description),
+            'word_count': len(description.split()),
+            'gemini_insights': gemini_analysis.get('insights', {}),
+            'confidence_score': self._calculate_analysis_confidence(field_analysis, nlp_analysis)
+        }
+
+    async def _analyze_with_gemini(self, description: str, context: Optional[TextContext] = None) -> Dict[str, Any]:
         """
         Use Gemini AI for comprehensive text analysis
         """
         try:
-            if not self.gemini_model:
-                return await self._analyze_with_openai(description)
+            if not self.llm_client.available:
+                return {}
+            
+            # Exact, then near-duplicate description: reuse the earlier LLM result
+            embedding = None
+            guard = ""
+            if self.analysis_cache:
+                cached = await self.analysis_cache.get_exact(description)
+                if cached is not None:
+                    return cached
+                embedding = await asyncio.to_thread(self._embed_for_cache, description)
+                guard = self._cache_guard(context or TextContext(description))
+                cached = await self.analysis_cache.get_semantic(embedding, guard)
+                if cached is not None:
+                    logger.info("Reusing cached Gemini analysis of a near-identical description")
+                    return cached
+            
+            # High-urgency posts jump the LLM queue when the budget is tight
+            urgent = context is not None and self._detect_urgency(context) == 'high'
+            analysis = await self._request_gemini_analysis(description, 'urgent' if urgent else 'interactive')
+            if self.analysis_cache and isinstance(analysis, dict) and analysis:
+                await self.analysis_cache.put(description, analysis, embedding, guard)
+            return analysis
             
-            prompt = f"""
+        except LLMError as e:
+            # Breaker open, deadline hit or retries exhausted: every field falls back to local analysis
+            logger.warning(f"Gemini analysis unavailable, using rule-based analysis: {str(e)}")
+            return {}
+        except Exception as e:
+            logger.error(f"Gemini analysis failed: {str(e)}")
+            return {}
+
+    async def _request_gemini_analysis(self, description: str, priority: str = "interactive") -> Any:
+        """One uncached Gemini analysis; raises on LLM or JSON errors"""
+        prompt = f"""
             Analyze this lost/found item description comprehensively and return a JSON response:
             
             Description: "{description}"
             
             Please analyze and return JSON with these exact fields:
-            {{
-                "keywords": ["list of 5-10 most important keywords"],
-                "sentiment": "positive/negative/neutral",
-                "category": "inferred category (electronics/accessories/clothing/etc)",
-                "urgency_level": "low/medium/high",
-                "location_mentioned": "true/false",
-                "brand_mentioned": "brand name or false",
-                "color_mentioned": "color name or false", 
-                "size_mentioned": "true/false",
-                "condition_mentioned": "true/false",
-                "emotional_tone": "worried/hopeful/frustrated/calm/desperate/relieved",
-                "has_contact_info": "true/false",
-                "insights": {{
-                    "item_value": "low/medium/high",
-                    "owner_attachment": "low/medium/high",
-                    "description_quality": "poor/good/excellent",
-                    "specificity": "vague/moderate/detailed"
-                }}
-            }}
+            {ANALYSIS_FIELDS}
             
             Be precise and only return valid JSON.
             """
+        
+        response_text = await self.llm_client.generate(prompt, priority=priority)
+        return self._parse_json_response(response_text)
+
+    def _parse_json_response(self, response_text: str) -> Any:
+        json_text = response_text.strip()
+        if json_text.startswith('```json'):
+            json_text = json_text[7:-3]
+        elif json_text.startswith('```'):
+            json_text = json_text[3:-3]
+        return json.loads(json_text)
+
+    async def _analyze_batch_with_gemini(self, contexts: List[TextContext]) -> List[Dict[str, Any]]:
+        """Gemini analysis for many descriptions: cache first, then several per prompt"""
+        results: List[Dict[str, Any]] = [{} for _ in contexts]
+        if not self.llm_client.available:
+            return results
+
+        pending = list(range(len(contexts)))
+        embeddings = [None] * len(contexts)
+        guards = [""] * len(contexts)
+        if self.analysis_cache:
+            pending = []
+            for index, context in enumerate(contexts):
+                cached = await self.analysis_cache.get_exact(context.description)
+                if cached is not None:
+                    results[index] = cached
+                else:
+                    pending.append(index)
+
+            if pending:
+                # One encoder call for every exact miss
+                vectors = await asyncio.to_thread(self._embed_batch_for_cache, [contexts[i].description for i in pending])
+                still_pending = []
+                for position, index in enumerate(pending):
+                    embeddings[index] = vectors[position] if vectors is not None else None
+                    guards[index] = self._cache_guard(contexts[index])
+                    cached = await self.analysis_cache.get_semantic(embeddings[index], guards[index])
+                    if cached is not None:
+                        results[index] = cached
+                    else:
+                        still_pending.append(index)
+                pending = still_pending
+
+        chunks = [pending[i:i + self.batch_llm_size] for i in range(0, len(pending), self.batch_llm_size)]
+        chunk_results = await asyncio.gather(*(
+            self._analyze_chunk_with_gemini([contexts[i].description for i in chunk]) for chunk in chunks
+        ))
+        for chunk, analyses in zip(chunks, chunk_results):
+            for index, analysis in zip(chunk, analyses):
+                results[index] = analysis
+                if self.analysis_cache and analysis:
+                    await self.analysis_cache.put(contexts[index].description, analysis, embeddings[index], guards[index])
+        return results
+
+    async def _analyze_chunk_with_gemini(self, descriptions: List[str]) -> List[Dict[str, Any]]:
+        """
+        Several descriptions in one prompt, answered as a JSON array keyed by
+        index. Descriptions missing from an unusable answer are retried one by one.
+        """
+        items = "\n".join(f"[{index}] {json.dumps(description, ensure_ascii=False)}" for index, description in enumerate(descriptions))
+        prompt = f"""
+            Analyze each of these lost/found item descriptions and return a JSON array
+            with one object per description:
             
-            response = self.gemini_model.generate_content(prompt)
-            
-            # Parse JSON response
-            json_text = response.text.strip()
-            if json_text.startswith('```json'):
-                json_text = json_text[7:-3]
-            elif json_text.startswith('```'):
-                json_text = json_text[3:-3]
+            {items}
             
-            analysis = json.loads(json_text)
-            return analysis
+            Every object must have "index" (the number in brackets before the description)
+            and these exact fields:
+            {ANALYSIS_FIELDS}
             
+            Be precise and only return a valid JSON array.
+            """
+
+        by_index: Dict[int, Dict[str, Any]] = {}
+        try:
+            # Bulk analysis is backfill work: lowest lane, shed first when the budget is tight
+            parsed = self._parse_json_response(await self.llm_client.generate(prompt, priority="background"))
+            for entry in parsed if isinstance(parsed, list) else []:
+                if isinstance(entry, dict) and isinstance(entry.get('index'), int):
+                    by_index[entry.pop('index')] = entry
+        except LLMError as e:
+            # Retrying item by item would only hit the same outage
+            logger.warning(f"Batched Gemini analysis unavailable, using rule-based analysis: {str(e)}")
+            return [{} for _ in descriptions]
         except Exception as e:
-            logger.error(f"Gemini analysis failed: {str(e)}")
-            return await self._analyze_with_openai(description)
+            logger.warning(f"Batched Gemini response could not be parsed: {str(e)}")
+
+        missing = [index for index in range(len(descriptions)) if index not in by_index]
+        if missing:
+            logger.warning(f"Batched Gemini response missed {len(missing)} of {len(descriptions)} descriptions, retrying individually")
+            retried = await asyncio.gather(
+                *(self._request_gemini_analysis(descriptions[index], "background") for index in missing),
+                return_exceptions=True
+            )
+            for index, analysis in zip(missing, retried):
+                by_index[index] = analysis if isinstance(analysis, dict) else {}
+        return [by_index[index] for index in range(len(descriptions))]
 
    
 
-    async def _perform_nlp_analysis(self, description: str) -> Dict[str, Any]:
+    def _embed_for_cache(self, description: str) -> Optional[np.ndarray]:
+        """One description -> 1-D MiniLM vector, or None if encoding fails"""
+        try:
+            with stage_timer("text_encode"):
+                return self.embedding_model.encode(description)
+        except Exception as e:
+            logger.error(f"Cache embedding failed: {str(e)}")
+            return None
+
+    def _embed_batch_for_cache(self, descriptions: List[str]) -> Optional[np.ndarray]:
+        """Several descriptions in one encoder call -> (n, dim) matrix, or None if encoding fails"""
+        try:
+            with stage_timer("text_encode"):
+                return self.embedding_model.encode(descriptions)
+        except Exception as e:
+            logger.error(f"Cache embedding failed: {str(e)}")
+            return None
+
+    def _cache_guard(self, context: TextContext) -> str:
+        """Attributes that must agree before a near-duplicate's analysis is reused"""
+        return f"{self._extract_color(context)}|{self._extract_brand(context)}"
+
+    def get_emotion_stats(self) -> Dict[str, Any]:
+        stats = self.emotion_classifier.get_stats() if self.emotion_classifier else {}
+        return {"mode": self.emotion_mode, **stats}
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.analysis_cache.get_stats() if self.analysis_cache else {"enabled": False}
+
+    @timed_stage("text_local_analysis")
+    def _run_local_analysis(self, context: TextContext):
+        """All local (CPU) analysis for one request - runs on a worker thread"""
+        return self._perform_nlp_analysis(context), self._get_local_fields(context)
+
+    def _run_local_batch(self, contexts: List[TextContext]):
+        """Local analysis for many descriptions, with the emotion model run in batches"""
+        try:
+            if self.emotion_mode == 'on':
+                TextContext.classify_batch(contexts, self.emotion_classifier, self.batch_model_size)
+        except Exception as e:
+            # Each description then falls back to its own classifier call
+            logger.error(f"Batched emotion classification failed: {str(e)}")
+        return [self._run_local_analysis(context) for context in contexts]
+
+    def _perform_nlp_analysis(self, context: TextContext) -> Dict[str, Any]:
         """
         Perform detailed NLP analysis using traditional methods
         """
         try:
             # Sentiment analysis
-            sentiment_scores = self.sentiment_analyzer.polarity_scores(description)
-            
-            # Emotion analysis
-            emotions = self.emotion_classifier(description)
-            top_emotion = max(emotions[0], key=lambda x: x['score'])
+            sentiment_scores = self.sentiment_analyzer.polarity_scores(context.description)
             
             # Keyword extraction
-            keywords = self._extract_advanced_keywords(description)
+            keywords = self._extract_advanced_keywords(context)
             
             # Entity extraction
-            entities = self._extract_entities(description)
+            entities = self._extract_entities(context)
             
-            return {
+            analysis = {
                 'sentiment_scores': sentiment_scores,
-                'emotion_confidence': top_emotion['score'],
                 'extracted_keywords': keywords,
                 'entities': entities,
-                'readability_score': self._calculate_readability(description)
+                'readability_score': self._calculate_readability(context)
             }
             
+            # Emotion analysis (scores are reused for the emotional tone); skipped while the classifier is off
+            if context.has_classifier:
+                analysis['emotion_confidence'] = context.top_emotion['score']
+            return analysis
+            
         except Exception as e:
             logger.error(f"NLP analysis failed: {str(e)}")
             return {}
 
-    async def _extract_specific_fields(self, description: str, gemini_analysis: Dict) -> Dict[str, Any]:
+    def _get_local_fields(self, context: TextContext) -> Dict[str, Any]:
         """
-        Extract and validate specific fields required for matching
+        Rule-based value for every matching field, used wherever Gemini is silent
         """
-        desc_lower = description.lower()
-        
-        # Use Gemini results as primary, fallback to rule-based
         return {
-            'keywords': gemini_analysis.get('keywords', self._extract_keywords_fallback(description)),
-            'sentiment': self._normalize_sentiment(gemini_analysis.get('sentiment', 'neutral')),
-            'category': gemini_analysis.get('category', self._infer_category(description)),
-            'urgency_level': gemini_analysis.get('urgency_level', self._detect_urgency(description)),
-            'location_mentioned': str(gemini_analysis.get('location_mentioned', self._has_location(description))).lower(),
-            'brand_mentioned': gemini_analysis.get('brand_mentioned', self._extract_brand(description)),
-            'color_mentioned': gemini_analysis.get('color_mentioned', self._extract_color(description)),
-            'size_mentioned': str(gemini_analysis.get('size_mentioned', self._has_size(description))).lower(),
-            'condition_mentioned': str(gemini_analysis.get('condition_mentioned', self._has_condition(description))).lower(),
-            'emotional_tone': gemini_analysis.get('emotional_tone', self._analyze_emotion_tone(description)),
-            'has_contact_info': gemini_analysis.get('has_contact_info', self._has_contact_info(description))
+            'keywords': self._extract_keywords_fallback(context),
+            'sentiment': 'neutral',
+            'category': self._infer_category(context),
+            'urgency_level': self._detect_urgency(context),
+            'location_mentioned': self._has_location(context),
+            'brand_mentioned': self._extract_brand(context),
+            'color_mentioned': self._extract_color(context),
+            'size_mentioned': self._has_size(context),
+            'condition_mentioned': self._has_condition(context),
+            'emotional_tone': self._analyze_emotion_tone(context),
+            'has_contact_info': self._has_contact_info(context)
         }
 
-    def _extract_advanced_keywords(self, text: str) -> List[str]:
+    def _extract_specific_fields(self, gemini_analysis: Dict, local_fields: Dict) -> Dict[str, Any]:
+        """
+        Extract and validate specific fields required for matching
+        """
+        # Use Gemini results as primary, fallback to rule-based
+        merged = {field: gemini_analysis.get(field, value) for field, value in local_fields.items()}
+        merged['sentiment'] = self._normalize_sentiment(merged['sentiment'])
+        for field in ('location_mentioned', 'size_mentioned', 'condition_mentioned'):
+            merged[field] = str(merged[field]).lower()
+        return merged
+
+    def _extract_advanced_keywords(self, context: TextContext) -> List[str]:
         """
         Advanced keyword extraction using multiple techniques
         """
-        # Clean and tokenize
-        text_lower = text.lower()
-        tokens = word_tokenize(text_lower)
+        # Shared tokenization of the lowercased text
+        tokens = context.tokens
         
         # Remove stopwords and punctuation
-        stop_words = set(stopwords.words('english'))
+        stop_words = get_stop_words()
         keywords = [word for word in tokens if word.isalnum() and word not in stop_words and len(word) > 2]
         
         # Add bigrams and trigrams
@@ -226,66 +569,31 @@ class EnhancedTextAnalyzer:
         sorted_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)
         return [word for word, freq in sorted_keywords[:15]]
 
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def _extract_entities(self, context: TextContext) -> Dict[str, List[str]]:
         """
         Extract named entities from text
         """
-        entities = {
-            'brands': [],
-            'locations': [],
-            'colors': [],
-            'materials': [],
-            'numbers': []
-        }
-        
-        # Brand patterns
-        brand_patterns = [
-            r'\b(apple|samsung|sony|nike|adidas|puma|hp|dell|lenovo|asus|microsoft|google)\b',
-            r'\b(rolex|casio|titan|fossil|seiko|omega)\b',
-            r'\b(gucci|prada|louis vuitton|chanel|hermes)\b'
-        ]
+        matches = context.matches
         
-        for pattern in brand_patterns:
-            matches = re.findall(pattern, text.lower())
-            entities['brands'].extend(matches)
+        # Named places plus the word following a preposition ("near gate", "in hostel")
+        locations = list(matches.get('entity_place', []))
+        locations.extend(word for _, word in PREPOSITION_PHRASE_PATTERN.findall(context.lower))
         
-        # Location patterns
-        location_patterns = [
-            r'\b(library|cafeteria|gate|building|hostel|campus|college|university)\b',
-            r'\b(near|at|in|outside|inside|between|behind)\s+(\w+)\b'
-        ]
-        
-        for pattern in location_patterns:
-            matches = re.findall(pattern, text.lower())
-            if isinstance(matches[0], tuple) if matches else False:
-                entities['locations'].extend([match[1] for match in matches])
-            else:
-                entities['locations'].extend(matches)
-        
-        # Color extraction
-        colors = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'brown', 'gray', 'silver', 'gold', 'pink', 'purple', 'orange']
-        for color in colors:
-            if color in text.lower():
-                entities['colors'].append(color)
-        
-        # Material extraction
-        materials = ['leather', 'plastic', 'metal', 'fabric', 'cotton', 'silk', 'wool', 'denim']
-        for material in materials:
-            if material in text.lower():
-                entities['materials'].append(material)
-        
-        # Number extraction
-        numbers = re.findall(r'\b\d+\b', text)
-        entities['numbers'] = numbers
-        
-        return entities
+        return {
+            'brands': matches.get('entity_brand', []),
+            'locations': locations,
+            'colors': matches.get('entity_color', []),
+            'materials': matches.get('material', []),
+            'numbers': NUMBER_PATTERN.findall(context.description)
+        }
 
-    def _calculate_readability(self, text: str) -> float:
+
+    def _calculate_readability(self, context: TextContext) -> float:
         """
         Calculate text readability score
         """
-        sentences = sent_tokenize(text)
-        words = word_tokenize(text)
+        sentences = context.sentences
+        words = context.tokens
         
         if len(sentences) == 0 or len(words) == 0:
             return 0.0
@@ -309,161 +617,91 @@ class EnhancedTextAnalyzer:
         else:
             return 'neutral'
 
-    def _infer_category(self, text: str) -> str:
+    def _infer_category(self, context: TextContext) -> str:
         """
         Infer category from text content
         """
-        text_lower = text.lower()
-        
-        category_keywords = {
-            'electronics': ['phone', 'laptop', 'tablet', 'charger', 'headphones', 'camera', 'watch'],
-            'accessories': ['wallet', 'purse', 'bag', 'jewelry', 'ring', 'necklace', 'bracelet'],
-            'clothing': ['shirt', 'pants', 'jacket', 'shoes', 'dress', 'hat', 'scarf'],
-            'documents': ['id', 'card', 'license', 'passport', 'certificate', 'document'],
-            'keys': ['key', 'keychain', 'remote'],
-            'books': ['book', 'notebook', 'textbook', 'novel', 'magazine'],
-            'sports': ['ball', 'racket', 'equipment', 'gear', 'sports']
-        }
-        
-        for category, keywords in category_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
+        for category in CATEGORY_KEYWORDS:
+            if f'category:{category}' in context.matches:
                 return category
         
         return 'other'
 
-    def _detect_urgency(self, text: str) -> str:
+
+    def _detect_urgency(self, context: TextContext) -> str:
         """
         Detect urgency level from text
         """
-        text_lower = text.lower()
-        
-        high_urgency = ['urgent', 'emergency', 'asap', 'immediately', 'important', 'desperately', 'please help']
-        medium_urgency = ['please', 'help', 'need', 'missing', 'lost today', 'reward']
-        
-        if any(word in text_lower for word in high_urgency):
+        if 'urgency:high' in context.matches:
             return 'high'
-        elif any(word in text_lower for word in medium_urgency):
+        elif 'urgency:medium' in context.matches:
             return 'medium'
         else:
             return 'low'
 
-    def _has_location(self, text: str) -> bool:
+
+    def _has_location(self, context: TextContext) -> bool:
         """
         Check if location is mentioned
         """
-        location_indicators = [
-            'near', 'at', 'in', 'outside', 'inside', 'between', 'behind', 'front',
-            'library', 'cafeteria', 'gate', 'building', 'room', 'floor', 'campus',
-            'college', 'university', 'school', 'hospital', 'park', 'mall', 'station'
-        ]
-        
-        return any(indicator in text.lower() for indicator in location_indicators)
+        return 'location' in context.matches
 
-    def _extract_brand(self, text: str) -> str:
+
+    def _extract_brand(self, context: TextContext) -> str:
         """
         Extract brand mentions
         """
-        brands = [
-            'apple', 'samsung', 'sony', 'nike', 'adidas', 'puma', 'hp', 'dell',
-            'lenovo', 'asus', 'acer', 'microsoft', 'google', 'amazon', 'flipkart',
-            'rolex', 'casio', 'titan', 'fossil', 'seiko', 'omega', 'gucci', 'prada'
-        ]
-        
-        text_lower = text.lower()
-        for brand in brands:
-            if brand in text_lower:
-                return brand
-        
-        return 'false'
+        return TEXT_MATCHER.first_by_priority(context.matches, 'brand') or 'false'
+
 
-    def _extract_color(self, text: str) -> str:
+    def _extract_color(self, context: TextContext) -> str:
         """
         Extract color mentions
         """
-        colors = [
-            'black', 'white', 'red', 'blue', 'green', 'yellow', 'orange',
-            'purple', 'pink', 'brown', 'gray', 'grey', 'silver', 'gold',
-            'cyan', 'magenta', 'maroon', 'navy', 'olive', 'lime', 'dark', 'light'
-        ]
-        
-        text_lower = text.lower()
-        for color in colors:
-            if color in text_lower:
-                return color
-        
-        return 'false'
+        return TEXT_MATCHER.first_by_priority(context.matches, 'color') or 'false'
+
 
-    def _has_size(self, text: str) -> bool:
+    def _has_size(self, context: TextContext) -> bool:
         """
         Check if size is mentioned
         """
-        size_indicators = [
-            'small', 'medium', 'large', 'big', 'huge', 'tiny', 'mini',
-            'compact', 'xl', 'xxl', 'size', 'inch', 'cm', 'mm',
-            'tall', 'short', 'wide', 'narrow', 'thick', 'thin'
-        ]
-        
-        return any(size in text.lower() for size in size_indicators)
+        return 'size' in context.matches
+
 
-    def _has_condition(self, text: str) -> bool:
+    def _has_condition(self, context: TextContext) -> bool:
         """
         Check if condition is mentioned
         """
-        condition_words = [
-            'new', 'old', 'used', 'worn', 'damaged', 'broken', 'cracked',
-            'scratched', 'mint', 'excellent', 'good', 'fair', 'poor',
-            'working', 'not working', 'functional', 'defective'
-        ]
-        
-        return any(condition in text.lower() for condition in condition_words)
+        return 'condition' in context.matches
+
 
-    def _analyze_emotion_tone(self, text: str) -> str:
+    def _analyze_emotion_tone(self, context: TextContext) -> str:
         """
         Analyze emotional tone
         """
         try:
-            emotions = self.emotion_classifier(text)
-            top_emotion = max(emotions[0], key=lambda x: x['score'])
-            
-            emotion_mapping = {
-                'joy': 'hopeful',
-                'optimism': 'hopeful',
-                'anger': 'frustrated',
-                'sadness': 'worried',
-                'fear': 'worried',
-                'surprise': 'surprised',
-                'disgust': 'frustrated',
-                'trust': 'calm'
-            }
-            
-            return emotion_mapping.get(top_emotion['label'], 'concerned')
+            # Same classifier output as the NLP stage - no second model run
+            top_emotion = context.top_emotion
+            return EMOTION_TONES.get(top_emotion['label'], 'concerned')
             
         except Exception:
             # Fallback to keyword-based analysis
-            text_lower = text.lower()
-            if any(word in text_lower for word in ['worried', 'anxious', 'desperate']):
-                return 'worried'
-            elif any(word in text_lower for word in ['angry', 'frustrated', 'annoyed']):
-                return 'frustrated'
-            elif any(word in text_lower for word in ['hope', 'hopeful', 'optimistic']):
-                return 'hopeful'
-            else:
-                return 'concerned'
+            for tone in ('worried', 'frustrated', 'hopeful'):
+                if f'tone:{tone}' in context.matches:
+                    return tone
+            return 'concerned'
 
-    def _has_contact_info(self, text: str) -> bool:
+    def _has_contact_info(self, context: TextContext) -> bool:
         """
         Check if contact information is present
         """
-        phone_pattern = r'\b\d{10}\b|\b\d{3}[-.\s]\d{3}[-.\s]\d{4}\b'
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        contact_words = ['call', 'contact', 'phone', 'email', 'reach', 'whatsapp', 'message']
-        
         return (
-            bool(re.search(phone_pattern, text)) or
-            bool(re.search(email_pattern, text)) or
-            any(word in text.lower() for word in contact_words)
+            bool(PHONE_PATTERN.search(context.description)) or
+            bool(EMAIL_PATTERN.search(context.description)) or
+            'contact' in context.matches
         )
 
+
     def _calculate_analysis_confidence(self, field_analysis: Dict, nlp_analysis: Dict) -> float:
         """
         Calculate overall confidence in the analysis
@@ -490,31 +728,33 @@ class EnhancedTextAnalyzer:
         
         return min(confidence, 1.0)
 
-    def _extract_keywords_fallback(self, text: str) -> List[str]:
+    def _extract_keywords_fallback(self, context: TextContext) -> List[str]:
         """
         Fallback keyword extraction
         """
-        words = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
+        words = context.tokens
+        stop_words = get_stop_words()
         keywords = [word for word in words if word.isalnum() and word not in stop_words and len(word) > 2]
         return list(set(keywords))[:10]
 
-    def _get_basic_analysis(self, description: str) -> Dict[str, Any]:
+    def _get_basic_analysis(self, description: str, context: Optional[TextContext] = None) -> Dict[str, Any]:
         """
         Basic analysis when AI services fail
         """
+        context = context or TextContext(description)
         return {
-            'keywords': self._extract_keywords_fallback(description),
+            'keywords': self._extract_keywords_fallback(context),
             'sentiment': 'neutral',
-            'category': self._infer_category(description),
-            'urgency_level': self._detect_urgency(description),
-            'location_mentioned': str(self._has_location(description)).lower(),
-            'brand_mentioned': self._extract_brand(description),
-            'color_mentioned': self._extract_color(description),
-            'size_mentioned': str(self._has_size(description)).lower(),
-            'condition_mentioned': str(self._has_condition(description)).lower(),
+            'category': self._infer_category(context),
+            'urgency_level': self._detect_urgency(context),
+            'location_mentioned': str(self._has_location(context)).lower(),
+            'brand_mentioned': self._extract_brand(context),
+            'color_mentioned': self._extract_color(context),
+            'size_mentioned': str(self._has_size(context)).lower(),
+            'condition_mentioned': str(self._has_condition(context)).lower(),
             'emotional_tone': 'concerned',
-            'has_contact_info': self._has_contact_info(description)
+            'has_contact_info': self._has_contact_info(context),
+            'word_count': len(context.description.split())
         }
 
     def _get_fallback_analysis(self, description: str) -> Dict[str, Any]:
@@ -524,7 +764,7 @@ class EnhancedTextAnalyzer:
         basic = self._get_basic_analysis(description)
         basic.update({
             'text_length': len(description),
-            'word_count': len(description.split()),
-            'confidence_score': 0.5
+            'confidence_score': 0.5,
+            'analysis_tier': 'fallback'
         })
         return basic
\ No newline at end of file
@@ -1,17 +1,30 @@
-import cv2
 import numpy as np
-from PIL import Image
-import google.generativeai as genai
-import io
-import base64
-from typing import List, Dict, Any
+import re
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 import os
-import requests
+import asyncio
+import httpx
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from utils.logger import logger
+from utils.http_client import AsyncHttpClient
+from utils.cache import TieredCache
+from utils.metrics import observe_stage, stage_timer
+from .visual_embedding import VisualEmbedder
+from .image_artifact import ImageArtifact
+from .image_workers import ImageProcessPool, run_cpu_stages
+from .llm_client import LLMClient, LLMError
+from .perceptual_hash import phash, PerceptualHashIndex
 from fastapi import HTTPException
 from pydantic import BaseModel
 import traceback
 
+# Worker stage name -> metrics stage name
+CPU_STAGE_METRICS = {"colors": "image_kmeans", "objects": "image_contours", "phash": "image_phash"}
+
 # Pydantic models for request/response
 class ImageAnalysisRequest(BaseModel):
     image_urls: List[str]  # List of Cloudinary URLs
@@ -22,22 +35,41 @@ class ImageAnalysisResponse(BaseModel):
     gemini_description: str
     gemini_tags: List[str]
 
+# Bump when the shape or meaning of a cached per-image result changes
+IMAGE_CACHE_VERSION = "img2"
+CLOUDINARY_VERSION_PATTERN = re.compile(r'/upload/(?:[^/]+/)*v\d+/')
+
 class ImageAnalyzer:
-    def __init__(self):
-        self.gemini_model = None
+    def __init__(self, http_client: AsyncHttpClient = None, llm_client: LLMClient = None):
+        # Shared pooled clients; main.py owns their lifecycle
+        self.http_client = http_client or AsyncHttpClient()
+        self.llm_client = llm_client or LLMClient()
+        self.visual_embedder = VisualEmbedder()
+        # Decode and embedding run on threads (they release the GIL); the remaining
+        # CPU stages go to a process pool so one worker can use several cores
+        self.process_pool = ImageProcessPool()
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("IMAGE_CPU_THREADS", min(4, os.cpu_count() or 1))),
+            thread_name_prefix="image-cpu"
+        )
+        self.cache = None
+        if os.getenv("IMAGE_CACHE_ENABLED", "true").lower() == "true":
+            self.cache = TieredCache(
+                "image_analysis",
+                max_entries=int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", 1000)),
+                ttl_seconds=float(os.getenv("IMAGE_CACHE_TTL_SECONDS", 30 * 24 * 3600)),
+                max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+                persistent=os.getenv("IMAGE_CACHE_PERSISTENT", "true").lower() == "true"
+            )
+        self.hash_index = PerceptualHashIndex()
         self.ready = False
 
     async def initialize(self):
         try:
-            # Initialize Gemini AI
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            if gemini_api_key:
-                genai.configure(api_key=gemini_api_key)
-                self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
-                logger.info("Gemini AI initialized successfully")
-            else:
-                logger.warning("GEMINI_API_KEY not found - Gemini analysis will be disabled")
-            
+            self.llm_client.initialize()
+            self.visual_embedder.initialize()
+            self.hash_index.load()
+            self.process_pool.start()
             self.ready = True
             logger.info("Image analyzer initialized successfully")
             
@@ -49,47 +81,70 @@ class ImageAnalyzer:
     def is_ready(self) -> bool:
         return self.ready
 
+    def shutdown(self):
+        if self.cache:
+            self.cache.flush()
+        self.process_pool.shutdown()
+        self.executor.shutdown(wait=False)
+
     async def analyze(self, image_urls: List[str]) -> Dict[str, Any]:
-        """Analyze images from Cloudinary URLs"""
+        """Analyze all images of an item concurrently and aggregate the results"""
         if not image_urls:
             logger.warning("No image URLs provided")
             return self._get_empty_analysis()
 
-        results = {
-            "objects": [],
-            "colors": [],
-            "gemini_description": "",
-            "gemini_tags": []
-        }
+        # Serve cached images without downloading; fetch and decode the rest in parallel
+        return await self._analyze_sources(image_urls, [self._resolve_image(url) for url in image_urls])
+
+    async def analyze_bytes(self, images: List[Tuple[str, bytes]]) -> Dict[str, Any]:
+        """Analyze uploaded images given as (name, encoded bytes), skipping the download entirely"""
+        if not images:
+            logger.warning("No images provided")
+            return self._get_empty_analysis()
+
+        sources = [f"upload:{name}" for name, _ in images]
+        return await self._analyze_sources(
+            sources,
+            [self._resolve_bytes(source, data) for source, (_, data) in zip(sources, images)]
+        )
 
+    async def _analyze_sources(self, sources: List[str], resolvers: List[Any]) -> Dict[str, Any]:
+        """Run the per-image resolvers concurrently, analyze cache misses and aggregate"""
         try:
-            logger.info(f"Starting analysis of {len(image_urls)} images")
-            
-            # Process first image (main analysis)
-            main_image_url = image_urls[0]
-            logger.info(f"Processing main image: {main_image_url}")
-            
-            # Download and process image
-            main_image = await self._load_image_from_url(main_image_url)
-            
-            # Color analysis
-            logger.info("Performing color analysis")
-            results["colors"] = self._analyze_colors(main_image)
-            
-            # Object detection (basic implementation)
-            logger.info("Performing object detection")
-            results["objects"] = self._detect_objects(main_image)
-            
-            # Gemini AI analysis (if available)
-            if self.gemini_model:
-                logger.info("Performing Gemini AI analysis")
-                gemini_analysis = await self._analyze_with_gemini(main_image_url)
-                results["gemini_description"] = gemini_analysis.get("description", "")
-                results["gemini_tags"] = gemini_analysis.get("tags", [])
-            else:
-                logger.info("Skipping Gemini analysis - not available")
-
-            logger.info("Image analysis completed successfully")
+            logger.info(f"Starting analysis of {len(sources)} images")
+            started = time.perf_counter()
+            timings = {}
+            
+            resolved = await asyncio.gather(*resolvers, return_exceptions=True)
+            timings["fetch"] = (time.perf_counter() - started) * 1000
+            per_image = [None] * len(sources)
+            pending = []
+            for i, (source, item) in enumerate(zip(sources, resolved)):
+                if isinstance(item, Exception):
+                    logger.error(f"Skipping image {source}: {getattr(item, 'detail', None) or str(item)}")
+                    continue
+                cached, artifact, cache_key = item
+                if cached is not None:
+                    per_image[i] = cached
+                else:
+                    pending.append((i, artifact, cache_key))
+            
+            if pending:
+                fresh = await self._analyze_artifacts([artifact for _, artifact, _ in pending], timings)
+                for (i, _, cache_key), image_result in zip(pending, fresh):
+                    per_image[i] = image_result
+                    if self.cache and self._is_cacheable(image_result):
+                        # Timings describe this run, not the image
+                        await self.cache.set(cache_key, {k: v for k, v in image_result.items() if k != "timings_ms"})
+            
+            per_image = [image_result for image_result in per_image if image_result is not None]
+            if not per_image:
+                raise ValueError("None of the images could be loaded")
+            
+            results = self._build_response(per_image)
+            timings["total"] = (time.perf_counter() - started) * 1000
+            results["timings_ms"] = {stage: round(ms, 2) for stage, ms in timings.items()}
+            logger.info(f"Image analysis completed successfully ({len(sources) - len(pending)} from cache, timings {results['timings_ms']})")
             return results
 
         except Exception as e:
@@ -97,8 +152,241 @@ class ImageAnalyzer:
             logger.error(traceback.format_exc())
             return self._get_empty_analysis()
 
+    async def _resolve_image(self, image_url: str) -> Tuple[Optional[Dict[str, Any]], Optional[ImageArtifact], str]:
+        """Return (cached result, None, key) on a hit, else (None, decoded artifact, key)"""
+        cache_key = self._url_cache_key(image_url)
+        if cache_key and self.cache:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached, None, cache_key
+
+        artifact = await self._fetch_artifact(image_url)
+
+        # Unversioned URL: the content itself is the only stable identity
+        if cache_key is None:
+            cache_key = self._content_cache_key(artifact.data)
+            if self.cache:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    return {**cached, "image_url": image_url}, None, cache_key
+
+        await self._decode_artifact(artifact)
+        return None, artifact, cache_key
+
+    async def _resolve_bytes(self, source: str, data: bytes) -> Tuple[Optional[Dict[str, Any]], Optional[ImageArtifact], str]:
+        """Like _resolve_image for bytes already in hand; always keyed by content hash"""
+        if not data:
+            raise HTTPException(status_code=400, detail="Empty image upload")
+        cache_key = self._content_cache_key(data)
+        if self.cache:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "image_url": source}, None, cache_key
+
+        artifact = ImageArtifact(source, data)
+        await self._decode_artifact(artifact)
+        return None, artifact, cache_key
+
+    async def _analyze_artifacts(self, artifacts: List[ImageArtifact], timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Run CPU stages, the visual embedding and Gemini calls concurrently, one result per image"""
+        loop = asyncio.get_running_loop()
+        
+        # CPU stages per image plus one batched visual embedding across all images
+        cpu_tasks = [self._run_cpu_stages(artifact) for artifact in artifacts]
+        embedding_task = loop.run_in_executor(
+            self.executor,
+            self.visual_embedder.embed_batch,
+            [artifact.bgr for artifact in artifacts]
+        )
+        
+        if self.llm_client.available:
+            logger.info(f"Performing Gemini AI analysis on {len(artifacts)} images")
+            gemini_tasks = [self._analyze_with_gemini(artifact) for artifact in artifacts]
+        else:
+            logger.info("Skipping Gemini analysis - not available")
+            gemini_tasks = []
+        
+        cpu_results, embeddings, gemini_results = await asyncio.gather(
+            self._timed(asyncio.gather(*cpu_tasks), timings, "cpu"),
+            self._timed(embedding_task, timings, "embedding"),
+            self._timed(asyncio.gather(*gemini_tasks), timings, "gemini")
+        )
+        # These ran in executors, so their spans are recorded from the measured durations
+        observe_stage("image_visual_embedding", timings["embedding"] / 1000, images=len(artifacts))
+        for i, cpu_result in enumerate(cpu_results):
+            for stage, ms in cpu_result["timings_ms"].items():
+                observe_stage(CPU_STAGE_METRICS.get(stage, f"image_{stage}"), ms / 1000, image=i)
+        
+        per_image = []
+        for i, artifact in enumerate(artifacts):
+            gemini_analysis = gemini_results[i] if gemini_results else {}
+            per_image.append({
+                "image_url": artifact.source,
+                "colors": cpu_results[i]["colors"],
+                "objects": cpu_results[i]["objects"],
+                "gemini_description": gemini_analysis.get("description", ""),
+                "gemini_tags": gemini_analysis.get("tags", []),
+                "phash": cpu_results[i]["phash"],
+                "timings_ms": cpu_results[i]["timings_ms"],
+                "visual_embedding": embeddings[i].tolist() if len(embeddings) else []
+            })
+        return per_image
+
+    def _build_response(self, per_image: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Item-level response from per-image results, fresh or cached"""
+        results = self._aggregate_results(per_image)
+        vectors = [image["visual_embedding"] for image in per_image if image.get("visual_embedding")]
+        results["visual_embedding"] = self._aggregate_embeddings(np.array(vectors, dtype=np.float32))
+        results["visual_embedding_model"] = self.visual_embedder.model_name
+        results["perceptual_hashes"] = list(dict.fromkeys(image["phash"] for image in per_image if image.get("phash")))
+        # Per-image vectors stay internal; the item-level embedding is what gets stored
+        results["per_image"] = [
+            {key: value for key, value in image.items() if key != "visual_embedding"}
+            for image in per_image
+        ]
+        return results
+
+    def _cache_namespace(self) -> str:
+        """Key prefix covering everything that changes a per-image result"""
+        return f"{IMAGE_CACHE_VERSION}:{self.visual_embedder.model_name}:{self.llm_client.provider_name}"
+
+    def _url_cache_key(self, image_url: str) -> Optional[str]:
+        """
+        Cache key for a versioned Cloudinary URL (/upload/v1751532113/...), whose
+        content never changes. Query strings and host case are normalized away.
+        Returns None for unversioned URLs.
+        """
+        parts = urlsplit(image_url.strip())
+        if not CLOUDINARY_VERSION_PATTERN.search(parts.path):
+            return None
+        return f"{self._cache_namespace()}:url:{parts.netloc.lower()}{parts.path}"
+
+    def _content_cache_key(self, data: bytes) -> str:
+        return f"{self._cache_namespace()}:sha256:{hashlib.sha256(data).hexdigest()}"
+
+    def _is_cacheable(self, image_result: Dict[str, Any]) -> bool:
+        """Don't pin a transient Gemini failure for the lifetime of the entry"""
+        if self.llm_client.available and not image_result.get("gemini_description"):
+            return False
+        return True
+
+    async def invalidate_cache(self, image_urls: List[str] = None, content_hashes: List[str] = None) -> int:
+        """Drop cached results for the given URLs / sha256 content hashes; everything if neither is given"""
+        if not self.cache:
+            return 0
+        if not image_urls and not content_hashes:
+            return await self.cache.clear()
+        
+        keys = [key for key in (self._url_cache_key(url) for url in image_urls or []) if key]
+        keys += [f"{self._cache_namespace()}:sha256:{digest.lower()}" for digest in content_hashes or []]
+        return await self.cache.delete(keys)
+
+    async def perceptual_hashes(self, image_urls: List[str]) -> List[str]:
+        """Perceptual hashes for a set of images, from the result cache when possible"""
+        resolved = await asyncio.gather(
+            *[self._resolve_image(url) for url in image_urls],
+            return_exceptions=True
+        )
+        hashes = []
+        for url, item in zip(image_urls, resolved):
+            if isinstance(item, Exception):
+                logger.error(f"Skipping image {url}: {getattr(item, 'detail', None) or str(item)}")
+                continue
+            cached, artifact, _ = item
+            if cached is not None and cached.get("phash"):
+                hashes.append(cached["phash"])
+            elif artifact is not None:
+                hashes.append(await asyncio.get_running_loop().run_in_executor(self.executor, phash, artifact.gray))
+        return list(dict.fromkeys(hashes))
+
+    def get_queue_depths(self) -> Dict[str, int]:
+        """Jobs waiting for (or running on) the image executors"""
+        return {
+            "image_threads": self.executor._work_queue.qsize(),
+            "image_process_pool": self.process_pool.pending
+        }
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.cache.get_stats() if self.cache else {"enabled": False}
+
+    async def _run_cpu_stages(self, artifact: ImageArtifact) -> Dict[str, Any]:
+        """CPU-bound analysis of one image, in the process pool when it is running"""
+        # Area threshold was tuned at full resolution, so scale it to the decoded size
+        min_area = 1000 * artifact.scale ** 2
+        if self.process_pool.enabled:
+            try:
+                return await self.process_pool.run(artifact.gray, artifact.thumbnail_rgb, min_area)
+            except BrokenProcessPool as e:
+                logger.error(f"Image process pool failed, falling back to threads: {str(e)}")
+                self.process_pool.shutdown()
+        
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, run_cpu_stages, artifact.gray, artifact.thumbnail_rgb, min_area
+        )
+
+    async def _timed(self, awaitable, timings: Dict[str, float], stage: str):
+        start = time.perf_counter()
+        result = await awaitable
+        timings[stage] = (time.perf_counter() - start) * 1000
+        return result
+
+    def _aggregate_results(self, per_image: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-image results into one item-level analysis"""
+        # Colors: average coverage across images
+        color_totals = {}
+        for image in per_image:
+            for color_info in image["colors"]:
+                color_totals[color_info["color"]] = color_totals.get(color_info["color"], 0) + color_info["percentage"]
+        colors = [
+            {"color": color, "percentage": round(total / len(per_image), 1)}
+            for color, total in color_totals.items()
+        ]
+        colors.sort(key=lambda x: x["percentage"], reverse=True)
+        
+        # Objects: union in first-seen order
+        objects = []
+        for image in per_image:
+            for obj in image["objects"]:
+                if obj not in objects:
+                    objects.append(obj)
+        
+        # Tags: most frequent across images first, ties by first appearance
+        tag_counts = {}
+        for image in per_image:
+            for tag in image["gemini_tags"]:
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
+        tags = sorted(tag_counts, key=lambda tag: tag_counts[tag], reverse=True)
+        
+        description = next((image["gemini_description"] for image in per_image if image["gemini_description"]), "")
+        
+        return {
+            "objects": objects[:5],
+            "colors": colors[:3],
+            "gemini_description": description,
+            "gemini_tags": tags[:10]
+        }
+
+    def _aggregate_embeddings(self, embeddings: np.ndarray) -> List[float]:
+        """Mean of the per-image vectors, re-normalized to unit length"""
+        if embeddings.size == 0:
+            return []
+        mean = embeddings.mean(axis=0)
+        norm = np.linalg.norm(mean)
+        return (mean / norm if norm > 0 else mean).tolist()
+
     async def _load_image_from_url(self, image_url: str):
-        """Load image from Cloudinary URL"""
+        """Load image from Cloudinary URL as an OpenCV BGR array"""
+        artifact = await self._load_artifact(image_url)
+        return artifact.bgr
+
+    async def _load_artifact(self, image_url: str) -> ImageArtifact:
+        """Download an image once and decode it into a shareable artifact"""
+        artifact = await self._fetch_artifact(image_url)
+        await self._decode_artifact(artifact)
+        return artifact
+
+    async def _fetch_artifact(self, image_url: str) -> ImageArtifact:
+        """Download the encoded bytes through the shared non-blocking client"""
         try:
             logger.info(f"Downloading image from: {image_url}")
             
@@ -106,179 +394,35 @@ class ImageAnalyzer:
             if not image_url.startswith(('http://', 'https://')):
                 raise ValueError(f"Invalid URL format: {image_url}")
             
-            # Download image from URL with timeout
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            # Check if response contains image data
-            if not response.content:
-                raise ValueError("Empty response from URL")
-            
-            # Convert to PIL Image
-            try:
-                image = Image.open(io.BytesIO(response.content))
-            except Exception as e:
-                raise ValueError(f"Invalid image data: {str(e)}")
+            with stage_timer("image_download"):
+                return await ImageArtifact.fetch(image_url, self.http_client)
             
-            # Convert to OpenCV format
-            opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            logger.info(f"Successfully loaded image: {opencv_image.shape}")
-            return opencv_image
-            
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to download image from URL {image_url}: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Failed to download image: {str(e)}")
         except Exception as e:
             logger.error(f"Failed to load image from URL {image_url}: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Failed to process image: {str(e)}")
 
-    def _analyze_colors(self, image) -> List[Dict[str, Any]]:
-        """Analyze dominant colors in the image"""
-        try:
-            # Resize image for faster processing
-            small_image = cv2.resize(image, (150, 150))
-            
-            # Convert to RGB
-            rgb_image = cv2.cvtColor(small_image, cv2.COLOR_BGR2RGB)
-            
-            # Reshape to list of pixels
-            pixels = rgb_image.reshape(-1, 3)
-            
-            # Try using K-means clustering to find dominant colors
-            try:
-                from sklearn.cluster import KMeans
-                kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
-                kmeans.fit(pixels)
-                
-                colors = []
-                labels = kmeans.labels_
-                
-                for i, center in enumerate(kmeans.cluster_centers_):
-                    percentage = np.count_nonzero(labels == i) / len(labels) * 100
-                    if percentage > 5:  # Only include colors that make up >5% of image
-                        color_name = self._rgb_to_color_name(center)
-                        colors.append({
-                            "color": color_name,
-                            "percentage": round(percentage, 1)
-                        })
-                
-                # Sort by percentage
-                colors.sort(key=lambda x: x["percentage"], reverse=True)
-                return colors[:3]  # Return top 3 colors
-                
-            except ImportError:
-                logger.warning("scikit-learn not available, using basic color analysis")
-                return self._basic_color_analysis(rgb_image)
-
-        except Exception as e:
-            logger.error(f"Color analysis failed: {str(e)}")
-            return []
-
-    def _basic_color_analysis(self, rgb_image) -> List[Dict[str, Any]]:
-        """Basic color analysis without sklearn"""
-        try:
-            # Calculate average color of the entire image
-            avg_color = np.mean(rgb_image.reshape(-1, 3), axis=0)
-            primary_color = self._rgb_to_color_name(avg_color)
-            
-            # Simple analysis: return the dominant color
-            return [{
-                "color": primary_color,
-                "percentage": 100.0
-            }]
-            
-        except Exception as e:
-            logger.error(f"Basic color analysis failed: {str(e)}")
-            return []
-
-    def _rgb_to_color_name(self, rgb):
-        """Convert RGB values to color name"""
-        r, g, b = rgb
-        
-        color_map = {
-            'black': (0, 0, 0),
-            'white': (255, 255, 255),
-            'red': (255, 0, 0),
-            'green': (0, 255, 0),
-            'blue': (0, 0, 255),
-            'yellow': (255, 255, 0),
-            'cyan': (0, 255, 255),
-            'magenta': (255, 0, 255),
-            'brown': (165, 42, 42),
-            'orange': (255, 165, 0),
-            'pink': (255, 192, 203),
-            'purple': (128, 0, 128),
-            'gray': (128, 128, 128),
-            'silver': (192, 192, 192),
-        }
-        
-        min_distance = float('inf')
-        closest_color = 'unknown'
-        
-        for color_name, color_rgb in color_map.items():
-            distance = np.sqrt(sum((a - b) ** 2 for a, b in zip(rgb, color_rgb)))
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = color_name
-        
-        return closest_color
-
-    def _detect_objects(self, image) -> List[str]:
-        """Basic object detection using contours"""
+    async def _decode_artifact(self, artifact: ImageArtifact):
+        """Decode off the event loop"""
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply Gaussian blur
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # Edge detection
-            edges = cv2.Canny(blurred, 50, 150)
-            
-            # Find contours
-            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            objects = []
-            shape_counts = {"rectangular": 0, "circular": 0, "irregular": 0}
-            
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > 1000:  # Filter small objects
-                    # Basic shape classification
-                    approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
-                    
-                    if len(approx) == 4:
-                        shape_counts["rectangular"] += 1
-                    elif len(approx) > 8:
-                        shape_counts["circular"] += 1
-                    else:
-                        shape_counts["irregular"] += 1
-            
-            # Convert counts to object descriptions
-            for shape, count in shape_counts.items():
-                if count > 0:
-                    objects.append(f"{shape}_object")
-            
-            return objects[:5]  # Return max 5 objects
-
+            with stage_timer("image_decode"):
+                await asyncio.get_running_loop().run_in_executor(self.executor, artifact.decode)
+            logger.info(f"Successfully loaded image: {artifact.bgr.shape}")
         except Exception as e:
-            logger.error(f"Object detection failed: {str(e)}")
-            return []
+            logger.error(f"Failed to decode image {artifact.source}: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Failed to process image: {str(e)}")
 
-    async def _analyze_with_gemini(self, image_url: str) -> Dict[str, Any]:
+    async def _analyze_with_gemini(self, artifact: ImageArtifact) -> Dict[str, Any]:
         """Analyze image with Gemini AI"""
         try:
-            if not self.gemini_model:
+            if not self.llm_client.available:
                 logger.warning("Gemini model not available")
                 return {"description": "", "tags": []}
 
-            # Download image for Gemini
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            # Convert to PIL Image for Gemini
-            image = Image.open(io.BytesIO(response.content))
+            # Reuse the already downloaded bytes - no second download or re-encode
+            image = artifact.gemini_part()
             
             # Prompt for lost & found item analysis
             prompt = """
@@ -294,15 +438,15 @@ class ImageAnalyzer:
             TAGS: [comma-separated keywords: item type, colors, brands, conditions, materials, etc.]
             """
             
-            # Generate content with Gemini
-            response = self.gemini_model.generate_content([prompt, image])
+            # Non-blocking call through the shared client (concurrency limit, deadline, retries)
+            response_text = await self.llm_client.generate([prompt, image])
             
             # Parse response
             description = ""
             tags = []
             
-            if response.text:
-                lines = response.text.split('\n')
+            if response_text:
+                lines = response_text.split('\n')
                 for line in lines:
                     line = line.strip()
                     if line.startswith('DESCRIPTION:'):
@@ -317,6 +461,9 @@ class ImageAnalyzer:
                 "tags": tags[:10]  # Limit to 10 tags
             }
 
+        except LLMError as e:
+            logger.warning(f"Gemini analysis unavailable, using local analysis only: {str(e)}")
+            return {"description": "", "tags": []}
         except Exception as e:
             logger.error(f"Gemini analysis failed: {str(e)}")
             return {"description": "", "tags": []}
@@ -331,38 +478,11 @@ class ImageAnalyzer:
         }
 
     async def generate_features(self, image_url: str) -> List[float]:
-        """Generate numerical features from image for similarity matching"""
+        """Generate an L2-normalized visual embedding from an image for similarity matching"""
         try:
             image = await self._load_image_from_url(image_url)
-            
-            # Extract simple features
-            features = []
-            
-            # Color histogram features
-            for i in range(3):  # RGB channels
-                hist = cv2.calcHist([image], [i], None, [32], [0, 256])
-                features.extend(hist.flatten())
-            
-            # Texture features
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Simple texture measures
-            features.append(np.std(gray))  # Standard deviation
-            features.append(np.mean(gray))  # Mean intensity
-            
-            # Edge density
-            edges = cv2.Canny(gray, 50, 150)
-            edge_density = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
-            features.append(edge_density)
-            
-            # Pad or truncate to exactly 100 features
-            if len(features) > 100:
-                features = features[:100]
-            else:
-                features.extend([0.0] * (100 - len(features)))
-            
-            return features
+            return self.visual_embedder.embed_batch([image])[0].tolist()
 
         except Exception as e:
             logger.error(f"Feature extraction failed: {str(e)}")
-            return [0.0] * 100
\ No newline at end of file
+            return []
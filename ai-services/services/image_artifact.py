@@ -0,0 +1,121 @@
+import io
+import os
+import cv2
+import numpy as np
+from PIL import Image
+from typing import Any, Dict, Optional
+from utils.http_client import AsyncHttpClient
+
+# Largest side any CPU stage needs; Gemini gets the original encoded bytes instead
+ANALYSIS_MAX_SIDE = int(os.getenv("IMAGE_ANALYSIS_MAX_SIDE", 512))
+THUMBNAIL_SIZE = (150, 150)
+
+# Decompression-bomb guard: reject images whose header claims more pixels than this
+MAX_IMAGE_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 40_000_000))
+
+# Pixels actually decoded before thumbnailing. JPEG draft mode decodes at up to 1/8
+# scale, but PNG, WebP and other formats decode at full size, so this bounds peak
+# memory per decoding image to about 4 bytes per pixel (16M pixels ~ 64 MB)
+MAX_DECODE_PIXELS = int(os.getenv("IMAGE_MAX_DECODE_PIXELS", 16_000_000))
+
+
+class ImageArtifact:
+    """
+    One image for the lifetime of a request: the encoded bytes are fetched once
+    and decoded once, straight to the analysis size, into a small pyramid
+    (analysis BGR, grayscale, color thumbnail) that every stage shares.
+    """
+
+    def __init__(self, source: str, data: bytes):
+        self.source = source
+        self.data = data
+        self.original_size = None
+        self.scale = 1.0
+        self._pil: Optional[Image.Image] = None
+        self._format: Optional[str] = None
+        self._bgr: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._thumbnail: Optional[np.ndarray] = None
+
+    @classmethod
+    async def fetch(cls, url: str, http_client: AsyncHttpClient) -> 'ImageArtifact':
+        data = await http_client.get_bytes(url)
+        if not data:
+            raise ValueError("Empty response from URL")
+        return cls(url, data)
+
+    def _open(self):
+        try:
+            image = Image.open(io.BytesIO(self.data))
+        except Exception as e:
+            raise ValueError(f"Invalid image data: {str(e)}")
+
+        # Only the header has been read so far - check dimensions before allocating pixels
+        self._format = image.format
+        self.original_size = image.size
+        width, height = image.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError(f"Image too large: {width}x{height} exceeds {MAX_IMAGE_PIXELS} pixels")
+
+        try:
+            # JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale directly
+            image.draft('RGB', (ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+        except Exception as e:
+            raise ValueError(f"Invalid image data: {str(e)}")
+
+        # image.size is now the decode size: reduced for JPEG, the full image otherwise
+        decode_width, decode_height = image.size
+        if decode_width * decode_height > MAX_DECODE_PIXELS:
+            raise ValueError(
+                f"Image too large: {image.format or 'image'} {width}x{height} would be decoded at full "
+                f"size, exceeding {MAX_DECODE_PIXELS} pixels"
+            )
+
+        try:
+            image.thumbnail((ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE), Image.BILINEAR)
+        except Exception as e:
+            raise ValueError(f"Invalid image data: {str(e)}")
+
+        # RGBA, palette and grayscale inputs would otherwise break the BGR conversion
+        self._pil = image if image.mode == 'RGB' else image.convert('RGB')
+        self.scale = max(self._pil.size) / max(width, height)
+
+    def decode(self) -> 'ImageArtifact':
+        """Decode once and build the shared pyramid (call from an executor)"""
+        if self._bgr is None:
+            rgb = np.asarray(self.pil_image)
+            self._bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+            self._gray = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+            self._thumbnail = cv2.resize(rgb, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        return self
+
+    @property
+    def pil_image(self) -> Image.Image:
+        """Decoded RGB image at analysis size (decoded on first access only)"""
+        if self._pil is None:
+            self._open()
+        return self._pil
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """OpenCV BGR array at analysis size, shared by object and feature stages"""
+        return self.decode()._bgr
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.decode()._gray
+
+    @property
+    def thumbnail_rgb(self) -> np.ndarray:
+        """150x150 RGB thumbnail used for color analysis"""
+        return self.decode()._thumbnail
+
+    @property
+    def mime_type(self) -> str:
+        if self._pil is None:
+            self._open()
+        return Image.MIME.get(self._format or '', 'image/jpeg')
+
+    def gemini_part(self) -> Dict[str, Any]:
+        """Inline blob with the original encoded bytes, so Gemini gets the image without re-encoding"""
+        return {"mime_type": self.mime_type, "data": self.data}
@@ -0,0 +1,180 @@
+import os
+import time
+import asyncio
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+from utils.logger import logger
+from .color_engine import analyze_colors
+from .perceptual_hash import phash
+
+# CPU stages are module-level so worker processes can run them. Keep this module
+# light: spawned workers import it (and main.py when launched as `python main.py`;
+# `uvicorn main:app` avoids that).
+
+
+def colors_stage(rgb_thumbnail: np.ndarray) -> List[Dict[str, Any]]:
+    """Dominant colors of the 150x150 RGB thumbnail"""
+    try:
+        return analyze_colors(rgb_thumbnail.reshape(-1, 3))
+    except Exception as e:
+        logger.error(f"Color analysis failed: {str(e)}")
+        return []
+
+
+def detect_objects(gray: np.ndarray, min_area: float = 1000) -> List[str]:
+    """Basic object detection using contours on a grayscale image"""
+    try:
+        # Apply Gaussian blur
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        # Edge detection
+        edges = cv2.Canny(blurred, 50, 150)
+
+        # Find contours
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        objects = []
+        shape_counts = {"rectangular": 0, "circular": 0, "irregular": 0}
+
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area > min_area:  # Filter small objects
+                # Basic shape classification
+                approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+
+                if len(approx) == 4:
+                    shape_counts["rectangular"] += 1
+                elif len(approx) > 8:
+                    shape_counts["circular"] += 1
+                else:
+                    shape_counts["irregular"] += 1
+
+        # Convert counts to object descriptions
+        for shape, count in shape_counts.items():
+            if count > 0:
+                objects.append(f"{shape}_object")
+
+        return objects[:5]  # Return max 5 objects
+
+    except Exception as e:
+        logger.error(f"Object detection failed: {str(e)}")
+        return []
+
+
+def run_cpu_stages(gray: np.ndarray, rgb_thumbnail: np.ndarray, min_area: float) -> Dict[str, Any]:
+    """All CPU-bound stages for one image, with per-stage wall time in milliseconds"""
+    timings = {}
+
+    start = time.perf_counter()
+    colors = colors_stage(rgb_thumbnail)
+    timings["colors"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    objects = detect_objects(gray, min_area)
+    timings["objects"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    image_hash = phash(gray)
+    timings["phash"] = (time.perf_counter() - start) * 1000
+
+    return {
+        "colors": colors,
+        "objects": objects,
+        "phash": image_hash,
+        "timings_ms": {stage: round(ms, 2) for stage, ms in timings.items()}
+    }
+
+
+def _run_from_shared_memory(name: str, layout: List[Tuple[int, Tuple[int, ...]]], min_area: float) -> Dict[str, Any]:
+    """Worker entry point: map the parent's arrays from shared memory without copying"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        gray, rgb_thumbnail = [
+            np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            for offset, shape in layout
+        ]
+        result = run_cpu_stages(gray, rgb_thumbnail, min_area)
+        # Views must be released before the segment can be closed
+        del gray, rgb_thumbnail
+        return result
+    finally:
+        shm.close()
+
+
+def _warm_up(_) -> int:
+    return os.getpid()
+
+
+class ImageProcessPool:
+    """
+    Bounded process pool for the image CPU stages. Arrays travel through a
+    shared-memory segment per call instead of being pickled; only the segment
+    name, the layout and the small result dicts cross the process boundary.
+    IMAGE_CPU_WORKERS=0 disables the pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers if workers is not None else int(
+            os.getenv("IMAGE_CPU_WORKERS", min(4, os.cpu_count() or 1))
+        )
+        self.start_method = os.getenv("IMAGE_POOL_START_METHOD", "spawn")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Jobs waiting for a slot or running in a worker
+        self.pending = 0
+        # At most two queued jobs per worker; further callers wait here
+        self._slots = asyncio.Semaphore(max(1, self.workers) * 2)
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        if self.workers <= 0 or self._executor is not None:
+            return
+        try:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context(self.start_method)
+            )
+            # Pay the worker start-up cost now rather than on the first request
+            list(self._executor.map(_warm_up, range(self.workers)))
+            logger.info(f"Image process pool started ({self.workers} workers, {self.start_method})")
+        except Exception as e:
+            logger.error(f"Failed to start image process pool, using threads: {str(e)}")
+            self._executor = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, gray: np.ndarray, rgb_thumbnail: np.ndarray, min_area: float) -> Dict[str, Any]:
+        arrays = [np.ascontiguousarray(gray), np.ascontiguousarray(rgb_thumbnail)]
+        layout = []
+        offset = 0
+        for array in arrays:
+            layout.append((offset, array.shape))
+            offset += array.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=offset)
+        self.pending += 1
+        try:
+            for (start, shape), array in zip(layout, arrays):
+                view = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=start)
+                view[...] = array
+                del view
+
+            async with self._slots:
+                # The pool may have been shut down while this call waited for a slot
+                if not self.enabled:
+                    raise BrokenProcessPool("Image process pool was shut down")
+                future = self._executor.submit(_run_from_shared_memory, shm.name, layout, min_area)
+                return await asyncio.wrap_future(future)
+        finally:
+            self.pending -= 1
+            shm.close()
+            shm.unlink()
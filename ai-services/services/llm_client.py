@@ -0,0 +1,448 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Dict, List, Optional, Union
+from utils.logger import logger
+from utils.metrics import LLM_CALLS, LLM_PROVIDER_SECONDS, STAGE_SECONDS
+from utils.tracing import span
+from .llm_scheduler import LLMScheduler
+
+Prompt = Union[str, List[Any]]
+
+
+class LLMError(Exception):
+    """An LLM call failed; callers fall back to their rule-based path"""
+
+
+class LLMUnavailable(LLMError):
+    """No provider configured, or the circuit breaker is open"""
+
+
+class LLMShed(LLMError):
+    """Dropped by the scheduler: the budget is saturated for this priority"""
+
+
+class LLMProvider:
+    name = "none"
+    # Image prompts carry Gemini-style inline parts; only providers that accept them get routed those
+    supports_images = False
+
+    async def generate(self, prompt: Prompt) -> str:
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    def __init__(self, api_key: str, model_name: str = 'gemini-1.5-flash'):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.name = model_name
+        self.supports_images = True
+
+    async def generate(self, prompt: Prompt) -> str:
+        # Native async call - the event loop stays free for the whole round trip
+        response = await self.model.generate_content_async(prompt)
+        return response.text or ""
+
+
+class OpenAIProvider(LLMProvider):
+    def __init__(self, api_key: str, model_name: str = 'gpt-4o-mini'):
+        import openai
+
+        self.client = openai.AsyncOpenAI(api_key=api_key)
+        self.name = model_name
+
+    async def generate(self, prompt: Prompt) -> str:
+        if not isinstance(prompt, str):
+            raise LLMError(f"{self.name} only accepts text prompts")
+        response = await self.client.chat.completions.create(
+            model=self.name,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content or ""
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline provider for load tests: sleeps for a configurable latency and
+    answers with a minimal response in the format the prompt asks for.
+    """
+    name = "stub"
+    supports_images = True
+
+    def __init__(self, latency_ms: float = None, jitter_ms: float = None, failure_rate: float = None):
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("LLM_STUB_LATENCY_MS", 500))
+        self.jitter_ms = jitter_ms if jitter_ms is not None else float(os.getenv("LLM_STUB_JITTER_MS", 100))
+        self.failure_rate = failure_rate if failure_rate is not None else float(os.getenv("LLM_STUB_FAILURE_RATE", 0))
+
+    async def generate(self, prompt: Prompt) -> str:
+        await asyncio.sleep(max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Stub provider failure")
+
+        text = prompt if isinstance(prompt, str) else " ".join(p for p in prompt if isinstance(p, str))
+        if "DESCRIPTION:" in text:
+            return "DESCRIPTION: Stub description of the item\nTAGS: stub, item"
+        if "JSON array" in text:
+            # Batched prompt: one empty object per "[index]" item
+            indices = re.findall(r'^\s*\[(\d+)\]', text, re.MULTILINE)
+            return json.dumps([{"index": int(index)} for index in indices])
+        # Empty JSON object: every field falls back to local analysis
+        return "{}"
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_seconds, then lets a single probe through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30, name: str = "LLM"):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.probing:
+                logger.warning(f"{self.name} circuit breaker opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def abandon_probe(self):
+        """A cancelled probe proved nothing; let the next call probe instead"""
+        self.probing = False
+
+
+def _percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class ProviderRoute:
+    """Routing state for one provider: its own breaker, concurrency slots and latency window"""
+
+    def __init__(self, provider: LLMProvider, max_concurrency: int, breaker: CircuitBreaker, window: int = 200):
+        self.provider = provider
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = breaker
+        # Provider latency, measured from slot acquisition; time queued for a slot is kept apart
+        self.latencies = deque(maxlen=window)
+        self.queue_waits = deque(maxlen=window)
+        self.stats = {
+            "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "cancelled": 0, "hedges": 0, "hedge_wins": 0
+        }
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    def supports(self, prompt: Prompt) -> bool:
+        return isinstance(prompt, str) or self.provider.supports_images
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile in seconds over the recent window, or None with too few samples"""
+        if len(self.latencies) < max(1, min_samples):
+            return None
+        return _percentile(self.latencies, q)
+
+    async def call(self, prompt: Prompt) -> str:
+        self.stats["calls"] += 1
+        queued = time.monotonic()
+        try:
+            with span("llm_provider", provider=self.name):
+                async with self.semaphore:
+                    start = time.monotonic()
+                    self.queue_waits.append(start - queued)
+                    text = await self.provider.generate(prompt)
+        except asyncio.CancelledError:
+            # Lost a hedge race or hit the caller's deadline
+            self.stats["cancelled"] += 1
+            self.breaker.abandon_probe()
+            raise
+        except Exception:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        elapsed = time.monotonic() - start
+        self.latencies.append(elapsed)
+        LLM_PROVIDER_SECONDS.observe(elapsed, self.name)
+        self.stats["successes"] += 1
+        self.breaker.record_success()
+        return text
+
+    def record_timeout(self):
+        self.stats["timeouts"] += 1
+        self.breaker.record_failure()
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        queue_p95 = _percentile(self.queue_waits, 95) if self.queue_waits else None
+        return {
+            **self.stats,
+            "circuit_state": self.breaker.state,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "queue_p95_ms": round(queue_p95 * 1000, 1) if queue_p95 is not None else None
+        }
+
+
+class LLMClient:
+    """
+    Shared async LLM access for all analyzers. Routes each call to the first
+    healthy provider in LLM_PROVIDERS order (gemini, openai, stub), with a
+    deadline per call (covering retries), jittered exponential backoff, and a
+    circuit breaker per provider. A call still unanswered at the primary's p95
+    latency is hedged to the next provider; the first answer wins and the
+    other request is cancelled.
+    """
+
+    def __init__(self, provider: Optional[LLMProvider] = None, providers: Optional[List[LLMProvider]] = None):
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+        self.timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", 15))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", 2))
+        self.backoff_base = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5))
+        self.backoff_max = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 4))
+        self.breaker_failures = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+        self.breaker_reset = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+        self.hedging = os.getenv("LLM_HEDGING", "true").lower() == "true"
+        # Until a provider has enough samples for a p95, hedge after this fixed delay
+        self.hedge_delay = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", 3))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+        self.routes: List[ProviderRoute] = []
+        self.scheduler = LLMScheduler()
+        self._initialized = False
+        self.stats = {
+            "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "retries": 0, "short_circuited": 0, "hedges": 0, "hedges_skipped": 0, "shed": 0
+        }
+        for configured in ([provider] if provider else []) + list(providers or []):
+            self._add_provider(configured)
+
+    def initialize(self):
+        # Shared by several analyzers; only the first call configures the providers
+        if self._initialized or self.routes:
+            return
+        self._initialized = True
+        names = os.getenv("LLM_PROVIDERS", os.getenv("LLM_PROVIDER", "gemini")).lower()
+        for name in [n.strip() for n in names.split(",") if n.strip()]:
+            try:
+                if name == "stub":
+                    self._add_provider(StubProvider())
+                elif name == "gemini" and os.getenv("GEMINI_API_KEY"):
+                    self._add_provider(GeminiProvider(os.getenv("GEMINI_API_KEY")))
+                elif name == "openai" and os.getenv("OPENAI_API_KEY"):
+                    self._add_provider(OpenAIProvider(os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_MODEL", "gpt-4o-mini")))
+                else:
+                    logger.warning(f"LLM provider {name} is not configured - skipping")
+            except Exception as e:
+                logger.error(f"Failed to initialize LLM provider {name}: {str(e)}")
+
+        if self.routes:
+            logger.info(f"LLM client initialized with providers {', '.join(route.name for route in self.routes)}")
+        else:
+            logger.warning(f"No LLM provider available (LLM_PROVIDERS={names}) - using rule-based analysis only")
+
+    def _add_provider(self, provider: LLMProvider):
+        breaker = CircuitBreaker(
+            failure_threshold=self.breaker_failures,
+            reset_seconds=self.breaker_reset,
+            name=provider.name
+        )
+        self.routes.append(ProviderRoute(provider, self.max_concurrency, breaker))
+
+    @property
+    def provider(self) -> Optional[LLMProvider]:
+        """The primary provider"""
+        return self.routes[0].provider if self.routes else None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.routes)
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider.name if self.provider else "none"
+
+    async def generate(self, prompt: Prompt, timeout: Optional[float] = None, priority: str = "interactive") -> str:
+        """
+        Generate text, raising LLMError once the deadline or retries are exhausted.
+        priority is the scheduler lane: urgent, interactive or background.
+        """
+        kind = "llm_text" if isinstance(prompt, str) else "llm_vision"
+        start = time.perf_counter()
+        with span(kind, priority=priority) as current:
+            try:
+                text = await self._generate(prompt, timeout, priority)
+            except LLMShed:
+                LLM_CALLS.inc(kind, "shed")
+                current.set_attribute("outcome", "shed")
+                raise
+            except LLMUnavailable:
+                LLM_CALLS.inc(kind, "unavailable")
+                current.set_attribute("outcome", "unavailable")
+                raise
+            except Exception:
+                LLM_CALLS.inc(kind, "error")
+                STAGE_SECONDS.observe(time.perf_counter() - start, kind)
+                raise
+            LLM_CALLS.inc(kind, "success")
+            STAGE_SECONDS.observe(time.perf_counter() - start, kind)
+            return text
+
+    async def _generate(self, prompt: Prompt, timeout: Optional[float], priority: str) -> str:
+        if not self.routes:
+            raise LLMUnavailable("No LLM provider configured")
+
+        self.stats["calls"] += 1
+        deadline = time.monotonic() + (timeout or self.timeout)
+        last_error: Optional[Exception] = None
+        failed: List[ProviderRoute] = []
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Quota admission; a saturated budget sheds low-priority calls to the local fallback
+            try:
+                with span("llm_queue", lane=priority):
+                    admitted = await self.scheduler.acquire(priority, prompt, timeout=remaining)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                last_error = LLMError(f"{priority} call queued past its deadline")
+                break
+            if not admitted:
+                self.stats["shed"] += 1
+                raise LLMShed(f"LLM budget saturated - {priority} call shed")
+            remaining = deadline - time.monotonic()
+
+            # Retries fail over to a provider that has not failed this call yet
+            primary = self._select(prompt, exclude=failed, claim=True)
+            if primary is None:
+                self.scheduler.refund(priority, prompt)
+                self.stats["short_circuited"] += 1
+                raise LLMUnavailable("No LLM provider available (circuit breakers open)")
+            secondary = self._select(prompt, exclude=failed + [primary], claim=False, fallback=False)
+            try:
+                # The deadline covers time spent queued for a concurrency slot too
+                text = await asyncio.wait_for(self._hedged(primary, secondary, prompt, priority), timeout=remaining)
+                self.stats["successes"] += 1
+                return text
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                primary.record_timeout()
+                last_error = LLMError(f"{primary.name} call exceeded its deadline")
+            except Exception as e:
+                last_error = e
+            failed.append(primary)
+
+            # Full jitter keeps retries from many requests from arriving in lockstep
+            backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            if attempt < self.max_retries and time.monotonic() + backoff < deadline:
+                self.stats["retries"] += 1
+                logger.warning(f"LLM call failed ({str(last_error)}), retrying in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+            else:
+                break
+
+        self.stats["failures"] += 1
+        raise LLMError(f"LLM call failed: {str(last_error)}")
+
+    def _select(self, prompt: Prompt, exclude: List[ProviderRoute], claim: bool, fallback: bool = True) -> Optional[ProviderRoute]:
+        """
+        First provider (in priority order) able to take the prompt whose breaker
+        is not open. claim=True reserves a half-open breaker's probe. Excluded
+        providers are reconsidered when nothing else is left, unless fallback=False.
+        """
+        candidates = [route for route in self.routes if route.supports(prompt)]
+        preferred = [route for route in candidates if route not in exclude]
+        for pool in ([preferred, candidates] if fallback else [preferred]):
+            for route in pool:
+                if claim and route.breaker.allow():
+                    return route
+                if not claim and route.breaker.state != "open":
+                    return route
+        return None
+
+    async def _hedged(self, primary: ProviderRoute, secondary: Optional[ProviderRoute], prompt: Prompt, priority: str) -> str:
+        """
+        Call the primary; past its p95 latency, race a second provider and cancel
+        the slower one. The hedge is a real request against the quota, so it is
+        only sent if the scheduler can admit it immediately.
+        """
+        first = asyncio.ensure_future(primary.call(prompt))
+        tasks = [first]
+        try:
+            if self.hedging and secondary is not None:
+                delay = primary.percentile(95, self.hedge_min_samples)
+                done, _ = await asyncio.wait(tasks, timeout=delay if delay is not None else self.hedge_delay)
+                if not done:
+                    if not self.scheduler.try_acquire(priority, prompt):
+                        self.stats["hedges_skipped"] += 1
+                    elif not secondary.breaker.allow():
+                        self.scheduler.refund(priority, prompt)
+                    else:
+                        self.stats["hedges"] += 1
+                        secondary.stats["hedges"] += 1
+                        tasks.append(asyncio.ensure_future(secondary.call(prompt)))
+
+            # The first successful answer wins; the call fails only once every request has
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            secondary.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "provider": self.provider_name,
+            "circuit_state": self.routes[0].breaker.state if self.routes else "closed",
+            "max_concurrency": self.max_concurrency,
+            "hedging": self.hedging,
+            "providers": {route.name: route.get_stats() for route in self.routes},
+            "scheduler": self.scheduler.get_stats()
+        }
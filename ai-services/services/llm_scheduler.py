@@ -0,0 +1,236 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Any, Dict, List, Optional, Union
+
+# Priority lanes, highest first
+LANES = ("urgent", "interactive", "background")
+
+# Gemini bills an inline image as a fixed number of input tokens
+IMAGE_PART_TOKENS = 258
+
+
+def estimate_tokens(prompt: Union[str, List[Any]], expected_output: int) -> int:
+    """Rough request cost for the TPM budget: ~4 characters per token plus the expected answer"""
+    parts = [prompt] if isinstance(prompt, str) else prompt
+    tokens = expected_output
+    for part in parts:
+        tokens += len(part) // 4 if isinstance(part, str) else IMAGE_PART_TOKENS
+    return tokens
+
+
+class TokenBucket:
+    """Refills continuously to capacity once a minute; a capacity of 0 means unlimited"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self):
+        now = time.monotonic()
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _threshold(self, amount: float, reserve: float) -> float:
+        # A request larger than the whole bucket waits for a full bucket instead of forever
+        return min(self.capacity, amount + reserve * self.capacity)
+
+    def can_take(self, amount: float, reserve: float = 0.0) -> bool:
+        return self.unlimited or self.level >= self._threshold(amount, reserve)
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+    def seconds_until(self, amount: float, reserve: float = 0.0) -> float:
+        if self.unlimited:
+            return 0.0
+        return max(0.0, (self._threshold(amount, reserve) - self.level) / self.rate)
+
+
+class _Waiter:
+    def __init__(self, lane: str, tokens: int, reserve: float):
+        self.lane = lane
+        self.tokens = tokens
+        self.reserve = reserve
+        self.enqueued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM providers. Requests-per-minute and
+    tokens-per-minute token buckets (LLM_RPM_LIMIT / LLM_TPM_LIMIT, 0 = no
+    limit) are shared by all callers. When they run dry, callers queue by
+    priority lane (urgent > interactive > background), FIFO within a lane, and
+    a waiter gains one lane of priority per LLM_QUEUE_AGING_SECONDS so nothing
+    starves. Background calls keep a reserve of the budget free for interactive
+    traffic and are shed (the caller uses its local fallback) instead of queueing.
+    """
+
+    def __init__(self):
+        self.requests = TokenBucket(float(os.getenv("LLM_RPM_LIMIT", 0)))
+        self.tokens = TokenBucket(float(os.getenv("LLM_TPM_LIMIT", 0)))
+        self.expected_output_tokens = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", 300))
+        self.background_reserve = float(os.getenv("LLM_BACKGROUND_RESERVE", 0.2))
+        self.shed_background = os.getenv("LLM_SHED_BACKGROUND", "true").lower() == "true"
+        self.max_queue = int(os.getenv("LLM_QUEUE_MAX_PER_LANE", 100))
+        self.aging_seconds = float(os.getenv("LLM_QUEUE_AGING_SECONDS", 10))
+        self._waiters: List[_Waiter] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {lane: {"granted": 0, "queued": 0, "shed": 0, "expired": 0, "refunded": 0} for lane in LANES}
+        self.waits = {lane: deque(maxlen=500) for lane in LANES}
+
+    @property
+    def enabled(self) -> bool:
+        return not (self.requests.unlimited and self.tokens.unlimited)
+
+    async def acquire(self, priority: str, prompt: Union[str, List[Any]], timeout: float) -> bool:
+        """
+        Wait for budget in the priority's lane. Returns False when the request is
+        shed; raises asyncio.TimeoutError when it is still queued at the timeout.
+        """
+        lane = priority if priority in LANES else "interactive"
+        if not self.enabled:
+            self.stats[lane]["granted"] += 1
+            return True
+
+        tokens = estimate_tokens(prompt, self.expected_output_tokens)
+        reserve = self.background_reserve if lane == "background" else 0.0
+        if self._grant_now(lane, tokens, reserve):
+            return True
+
+        depth = sum(1 for waiter in self._waiters if waiter.lane == lane)
+        if (lane == "background" and self.shed_background) or depth >= self.max_queue:
+            self.stats[lane]["shed"] += 1
+            return False
+
+        waiter = _Waiter(lane, tokens, reserve)
+        self._waiters.append(waiter)
+        self.stats[lane]["queued"] += 1
+        self._wake()
+        try:
+            await asyncio.wait_for(waiter.future, timeout=timeout)
+            return True
+        except BaseException as e:
+            # Timed out or cancelled just as the dispatcher granted: the caller never
+            # makes the call, so hand the budget back
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.refund(lane, prompt)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats[lane]["expired"] += 1
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def try_acquire(self, priority: str, prompt: Union[str, List[Any]]) -> bool:
+        """Grant only if the budget allows it right now; never queues (used for hedged calls)"""
+        lane = priority if priority in LANES else "interactive"
+        if not self.enabled:
+            self.stats[lane]["granted"] += 1
+            return True
+        reserve = self.background_reserve if lane == "background" else 0.0
+        return self._grant_now(lane, estimate_tokens(prompt, self.expected_output_tokens), reserve)
+
+    def refund(self, priority: str, prompt: Union[str, List[Any]]):
+        """Return a grant whose call was never made"""
+        lane = priority if priority in LANES else "interactive"
+        self.stats[lane]["refunded"] += 1
+        if not self.enabled:
+            return
+        self.requests.give_back(1)
+        self.tokens.give_back(estimate_tokens(prompt, self.expected_output_tokens))
+        if self._waiters:
+            self._wake()
+
+    def _grant_now(self, lane: str, tokens: int, reserve: float) -> bool:
+        """Grant without waiting when no one of equal or higher priority is queued"""
+        self._refill()
+        ahead = any(LANES.index(waiter.lane) <= LANES.index(lane) for waiter in self._waiters)
+        if not ahead and self._affordable(tokens, reserve):
+            self._grant(lane, tokens, 0.0)
+            return True
+        return False
+
+    def _refill(self):
+        self.requests.refill()
+        self.tokens.refill()
+
+    def _affordable(self, tokens: int, reserve: float) -> bool:
+        return self.requests.can_take(1, reserve) and self.tokens.can_take(tokens, reserve)
+
+    def _grant(self, lane: str, tokens: int, waited: float):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.stats[lane]["granted"] += 1
+        self.waits[lane].append(waited)
+
+    def _wake(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        """Grant queued requests as the buckets refill, best (aged) priority first"""
+        while True:
+            self._waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+            if not self._waiters:
+                return
+            self._refill()
+            now = time.monotonic()
+            waiter = min(
+                self._waiters,
+                key=lambda w: (LANES.index(w.lane) - (now - w.enqueued_at) / self.aging_seconds, w.enqueued_at)
+            )
+            if self._affordable(waiter.tokens, waiter.reserve):
+                self._waiters.remove(waiter)
+                self._grant(waiter.lane, waiter.tokens, now - waiter.enqueued_at)
+                waiter.future.set_result(None)
+                continue
+
+            delay = max(
+                self.requests.seconds_until(1, waiter.reserve),
+                self.tokens.seconds_until(waiter.tokens, waiter.reserve)
+            )
+            self._wakeup.clear()
+            try:
+                # New arrivals wake the loop early so a higher lane can go first
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.01))
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        lanes = {}
+        for lane in LANES:
+            waits = sorted(self.waits[lane])
+            lanes[lane] = {
+                **self.stats[lane],
+                "depth": sum(1 for waiter in self._waiters if waiter.lane == lane and not waiter.future.done()),
+                "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                "wait_p95_ms": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else 0.0
+            }
+        self._refill()
+        return {
+            "enabled": self.enabled,
+            "rpm_limit": self.requests.capacity,
+            "rpm_available": round(self.requests.level, 1) if not self.requests.unlimited else None,
+            "tpm_limit": self.tokens.capacity,
+            "tpm_available": round(self.tokens.level) if not self.tokens.unlimited else None,
+            "lanes": lanes
+        }
@@ -0,0 +1,228 @@
+import os
+import cv2
+import sqlite3
+import asyncio
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Set
+from utils.logger import logger
+
+HASH_BITS = 64
+
+
+def phash(gray: np.ndarray) -> str:
+    """
+    64-bit DCT perceptual hash of a grayscale image as 16 hex characters. Robust
+    to rescaling, recompression and small brightness changes.
+    """
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    # The DC term only encodes overall brightness, so keep it out of the threshold
+    bits = low > np.median(low[1:])
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def hamming_distance(hash1: str, hash2: str) -> int:
+    return bin(int(hash1, 16) ^ int(hash2, 16)).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance"""
+
+    def __init__(self):
+        self.root = None  # [hash int, item ids, {distance: child}]
+
+    def add(self, value: int, item_id: str):
+        if self.root is None:
+            self.root = [value, {item_id}, {}]
+            return
+        node = self.root
+        while True:
+            distance = bin(node[0] ^ value).count('1')
+            if distance == 0:
+                node[1].add(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, {item_id}, {}]
+                return
+            node = child
+
+    def discard(self, value: int, item_id: str):
+        """Detach an item; the node stays behind as a routing point"""
+        node = self.root
+        while node is not None:
+            distance = bin(node[0] ^ value).count('1')
+            if distance == 0:
+                node[1].discard(item_id)
+                return
+            node = node[2].get(distance)
+
+    def query(self, value: int, max_distance: int) -> List[tuple]:
+        """(distance, hash, item ids) for every stored hash within max_distance"""
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = bin(node[0] ^ value).count('1')
+            if distance <= max_distance and node[1]:
+                results.append((distance, node[0], node[1]))
+            # Triangle inequality: only subtrees in [d - k, d + k] can hold matches
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+
+class PerceptualHashIndex:
+    """
+    Near-duplicate index from item ids to the perceptual hashes of their images.
+    A SQLite file is the single owner of the data, shared by every uvicorn worker
+    (WAL mode, busy timeout). Each worker keeps a BK-tree for queries and brings
+    it up to date from a change log before answering, so an item indexed by one
+    worker is visible to all of them. All SQLite work runs on a worker thread.
+    """
+
+    # Change log rows kept for workers that are catching up; older gaps force a full reload
+    MAX_CHANGE_LOG = 10000
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PHASH_INDEX_PATH", os.path.join("data", "phash_index.sqlite3"))
+        self.items: Dict[str, List[str]] = {}
+        self.tree = BKTree()
+        self._db = None
+        self._seq = 0
+        # Guards the connection, the tree and the item map
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Open (or create) the index and build the in-memory tree"""
+        busy_timeout_ms = int(os.getenv("CACHE_BUSY_TIMEOUT_MS", 5000))
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+            self._db.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS phash_items ("
+                "item_id TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (item_id, hash))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS phash_changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, item_id TEXT NOT NULL)"
+            )
+            self._db.commit()
+            with self._lock:
+                self._reload()
+            logger.info(f"Loaded perceptual hash index with {len(self.items)} items")
+        except Exception as e:
+            logger.error(f"Failed to load perceptual hash index: {str(e)}")
+            self._db = None
+
+    async def add(self, item_id: str, hashes: Iterable[str]):
+        """Index (or re-index) an item's image hashes"""
+        unique = sorted({h.lower() for h in hashes if h})
+        for h in unique:
+            int(h, 16)  # ValueError for malformed hashes, before anything is written
+        await asyncio.to_thread(self._write, item_id, unique)
+
+    async def remove(self, item_id: str) -> bool:
+        return await asyncio.to_thread(self._write, item_id, [])
+
+    async def query(
+        self,
+        hashes: Iterable[str],
+        max_distance: int = 10,
+        exclude_item_id: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        hashes = list(hashes)
+        return await asyncio.to_thread(self._query, hashes, max_distance, exclude_item_id, limit)
+
+    def _write(self, item_id: str, hashes: List[str]) -> bool:
+        """Replace an item's hashes (none = remove) and log the change; True if the item existed"""
+        with self._lock:
+            if self._db is None:
+                raise RuntimeError("Perceptual hash index is not available")
+            existed = self._db.execute("DELETE FROM phash_items WHERE item_id = ?", (item_id,)).rowcount > 0
+            self._db.executemany(
+                "INSERT INTO phash_items (item_id, hash) VALUES (?, ?)", [(item_id, h) for h in hashes]
+            )
+            if existed or hashes:
+                seq = self._db.execute("INSERT INTO phash_changes (item_id) VALUES (?)", (item_id,)).lastrowid
+                if seq % 1000 == 0:
+                    self._db.execute("DELETE FROM phash_changes WHERE seq <= ?", (seq - self.MAX_CHANGE_LOG,))
+            self._db.commit()
+            self._sync()
+            return existed
+
+    def _query(self, hashes: List[str], max_distance: int, exclude_item_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Items with any image within max_distance bits of any query hash, closest first"""
+        with self._lock:
+            if self._db is not None:
+                self._sync()
+            best: Dict[str, Dict[str, Any]] = {}
+            for query_hash in hashes:
+                for distance, value, item_ids in self.tree.query(int(query_hash, 16), max_distance):
+                    for item_id in item_ids:
+                        if item_id == exclude_item_id:
+                            continue
+                        if item_id not in best or distance < best[item_id]["distance"]:
+                            best[item_id] = {
+                                "item_id": item_id,
+                                "distance": distance,
+                                "similarity": round(1 - distance / HASH_BITS, 4),
+                                "query_hash": query_hash,
+                                "matched_hash": f"{value:016x}"
+                            }
+        return sorted(best.values(), key=lambda match: match["distance"])[:limit]
+
+    def _sync(self):
+        """Apply changes other workers (or this one) logged since the last sync (caller holds _lock)"""
+        oldest = self._db.execute("SELECT MIN(seq) FROM phash_changes").fetchone()[0]
+        if oldest is not None and oldest > self._seq + 1:
+            # Fell behind the pruned log
+            self._reload()
+            return
+        changed = self._db.execute(
+            "SELECT seq, item_id FROM phash_changes WHERE seq > ? ORDER BY seq", (self._seq,)
+        ).fetchall()
+        if not changed:
+            return
+        for item_id in {item_id for _, item_id in changed}:
+            self._remove(item_id)
+            rows = self._db.execute("SELECT hash FROM phash_items WHERE item_id = ?", (item_id,)).fetchall()
+            self._insert(item_id, [row[0] for row in rows])
+        self._seq = changed[-1][0]
+
+    def _reload(self):
+        self.items = {}
+        self.tree = BKTree()
+        self._seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM phash_changes").fetchone()[0]
+        by_item: Dict[str, List[str]] = {}
+        for item_id, h in self._db.execute("SELECT item_id, hash FROM phash_items"):
+            by_item.setdefault(item_id, []).append(h)
+        for item_id, hashes in by_item.items():
+            self._insert(item_id, hashes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"items": len(self.items), "hashes": sum(len(hashes) for hashes in self.items.values())}
+
+    def _insert(self, item_id: str, hashes: Iterable[str]):
+        unique: Set[str] = {h.lower() for h in hashes if h}
+        if not unique:
+            return
+        self.items[item_id] = sorted(unique)
+        for h in unique:
+            self.tree.add(int(h, 16), item_id)
+
+    def _remove(self, item_id: str) -> bool:
+        hashes = self.items.pop(item_id, None)
+        if hashes is None:
+            return False
+        for h in hashes:
+            self.tree.discard(int(h, 16), item_id)
+        return True
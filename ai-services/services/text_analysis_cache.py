@@ -0,0 +1,112 @@
+import os
+import re
+import time
+import hashlib
+import unicodedata
+import numpy as np
+from typing import Any, Dict, Optional
+from utils.cache import TieredCache
+
+# Bump when the prompt or the shape of the cached LLM result changes
+TEXT_CACHE_VERSION = "txt1"
+
+
+def normalize_description(text: str) -> str:
+    """Case, Unicode form and whitespace differences should not defeat the exact tier"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return re.sub(r'\s+', ' ', text).strip(' .!?')
+
+
+class TextAnalysisCache:
+    """
+    Two-level cache for LLM text analysis results. Level one is an exact match
+    on the normalized description hash (memory + SQLite via TieredCache). Level
+    two is a semantic lookup: a new description whose MiniLM embedding has
+    cosine similarity >= threshold with a cached one reuses that result.
+
+    A guard string (e.g. extracted color and brand) must also match on the
+    semantic tier, so "black wallet" never borrows the analysis of "brown wallet".
+    """
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self.threshold = float(os.getenv("TEXT_CACHE_SIMILARITY", 0.95))
+        self.semantic_enabled = os.getenv("TEXT_CACHE_SEMANTIC", "true").lower() == "true"
+        self.ttl_seconds = float(os.getenv("TEXT_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+        self.capacity = int(os.getenv("TEXT_CACHE_MAX_ENTRIES", 5000))
+        self.store = TieredCache(
+            "text_analysis",
+            max_entries=self.capacity,
+            ttl_seconds=self.ttl_seconds,
+            max_bytes=int(os.getenv("TEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+            persistent=os.getenv("TEXT_CACHE_PERSISTENT", "true").lower() == "true"
+        )
+
+        # Semantic index: ring buffer of unit vectors, in memory only
+        self._vectors: Optional[np.ndarray] = None
+        self._keys = [None] * self.capacity
+        self._guards = [None] * self.capacity
+        self._expires = np.zeros(self.capacity)
+        self._next = 0
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def key_for(self, description: str) -> str:
+        digest = hashlib.sha256(normalize_description(description).encode('utf-8')).hexdigest()
+        return f"{TEXT_CACHE_VERSION}:{self.namespace}:{digest}"
+
+    async def get_exact(self, description: str) -> Optional[Dict[str, Any]]:
+        value = await self.store.get(self.key_for(description))
+        if value is not None:
+            self.stats["exact_hits"] += 1
+        return value
+
+    async def get_semantic(self, embedding: Optional[np.ndarray], guard: str = "") -> Optional[Dict[str, Any]]:
+        """Best cached result above the similarity threshold, or None (counted as a miss)"""
+        if self.semantic_enabled and self._vectors is not None and embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            scores = self._vectors @ (embedding / (np.linalg.norm(embedding) or 1.0))
+            scores[self._expires <= time.time()] = -1.0
+            for index in np.argsort(-scores)[:5]:
+                if scores[index] < self.threshold:
+                    break
+                if self._guards[index] != guard:
+                    continue
+                value = await self.store.get(self._keys[index])
+                if value is not None:
+                    self.stats["semantic_hits"] += 1
+                    return value
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, description: str, value: Dict[str, Any], embedding: Optional[np.ndarray] = None, guard: str = ""):
+        key = self.key_for(description)
+        await self.store.set(key, value)
+        if embedding is None or not self.semantic_enabled:
+            return
+
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return
+        if self._vectors is None:
+            self._vectors = np.zeros((self.capacity, embedding.shape[0]), dtype=np.float32)
+        slot = self._next
+        self._vectors[slot] = embedding / norm
+        self._keys[slot] = key
+        self._guards[slot] = guard
+        self._expires[slot] = time.time() + self.ttl_seconds
+        self._next = (slot + 1) % self.capacity
+
+    def flush(self):
+        self.store.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+            "semantic_entries": int((self._expires > time.time()).sum()),
+            "store": self.store.get_stats()
+        }
@@ -421,13 +421,15 @@ from utils.logger import logger
 from .enhanced_text_analyzer import EnhancedTextAnalyzer
 
 class TextAnalyzer:
-    def __init__(self):
-        self.enhanced_analyzer = EnhancedTextAnalyzer()
+    def __init__(self, llm_client=None, enhanced_analyzer: EnhancedTextAnalyzer = None):
+        # Share the main analyzer when given, so models and caches are loaded once
+        self.enhanced_analyzer = enhanced_analyzer or EnhancedTextAnalyzer(llm_client=llm_client)
         self.ready = False
 
     async def initialize(self):
         try:
-            await self.enhanced_analyzer.initialize()
+            if not self.enhanced_analyzer.is_ready():
+                await self.enhanced_analyzer.initialize()
             self.ready = True
             logger.info("Text analyzer initialized successfully")
             
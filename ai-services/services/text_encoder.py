@@ -0,0 +1,166 @@
+import os
+import inspect
+import numpy as np
+from typing import List, Union
+from utils.logger import logger
+from utils.assets import is_offline, model_dir, resolve_model, timed_load
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+
+# torch: PyTorch fp32 eager, int8: dynamic-int8 quantized torch,
+# onnx: ONNX Runtime fp32 graph, onnx_int8: ONNX Runtime with int8 weights
+BACKENDS = ('torch', 'int8', 'onnx', 'onnx_int8')
+
+
+def get_backend() -> str:
+    backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown EMBEDDING_BACKEND '{backend}', using torch")
+        return 'torch'
+    return backend
+
+
+# Bump when the export changes; older graphs are then re-exported instead of reused
+# (v1 bound attention_mask and token_type_ids to each other's inputs)
+ONNX_EXPORT_VERSION = 2
+
+
+def onnx_paths(model_name: str = DEFAULT_MODEL):
+    """Locations of the exported fp32 and int8 ONNX graphs inside the asset bundle"""
+    base = model_dir('onnx', model_name)
+    return (
+        os.path.join(base, f'model.v{ONNX_EXPORT_VERSION}.onnx'),
+        os.path.join(base, f'model_int8.v{ONNX_EXPORT_VERSION}.onnx')
+    )
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL) -> str:
+    """Export the transformer part of a sentence-transformers model to ONNX (plus an int8 copy)"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    source = resolve_model('sentence_transformers', model_name)
+    fp32_path, int8_path = onnx_paths(model_name)
+    os.makedirs(os.path.dirname(fp32_path), exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModel.from_pretrained(source)
+    model.eval()
+
+    sample = tokenizer(["lost black wallet near library"], return_tensors='pt')
+    # Positional export args bind in forward()'s order (input_ids, attention_mask,
+    # token_type_ids for BERT), not the tokenizer's key order
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    tokenizer.save_pretrained(os.path.dirname(fp32_path))
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    logger.info(f"Exported ONNX embedding model to {os.path.dirname(fp32_path)}")
+    return fp32_path
+
+
+class OnnxTextEncoder:
+    """
+    ONNX Runtime encoder producing the same vectors as the sentence-transformers
+    pipeline (transformer -> mean pooling -> L2 normalize)
+    """
+
+    def __init__(self, model_path: str, max_seq_length: int = 256):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("EMBEDDING_THREADS", 0))
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(model_path))
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.max_seq_length = max_seq_length
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            batches.append(self._encode_batch(sentences[start:start + batch_size]))
+
+        embeddings = np.vstack(batches) if batches else np.zeros((0, 384), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, sentences: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            sentences,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors='np'
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalize
+        mask = tokens['attention_mask'][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def _load_torch(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(resolve_model('sentence_transformers', model_name), device='cpu')
+
+
+def _load_int8(model_name: str):
+    import torch
+    model = _load_torch(model_name)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name: str, quantized: bool):
+    fp32_path, int8_path = onnx_paths(model_name)
+    if not os.path.exists(fp32_path):
+        if is_offline():
+            raise RuntimeError(
+                f"ONNX model not found in {os.path.dirname(fp32_path)} - "
+                f"run 'python -m scripts.fetch_assets --onnx' on a connected machine"
+            )
+        export_onnx(model_name)
+    return OnnxTextEncoder(int8_path if quantized else fp32_path)
+
+
+def load_text_encoder(model_name: str = DEFAULT_MODEL, backend: str = None):
+    """
+    Load the text embedding model with the configured inference backend.
+    Every backend exposes a SentenceTransformer-compatible encode().
+    """
+    backend = backend or get_backend()
+
+    with timed_load(f"{model_name} ({backend})"):
+        try:
+            if backend == 'int8':
+                return _load_int8(model_name)
+            if backend in ('onnx', 'onnx_int8'):
+                return _load_onnx(model_name, quantized=backend == 'onnx_int8')
+        except ImportError as e:
+            logger.warning(f"Embedding backend '{backend}' unavailable ({str(e)}), using torch")
+
+        return _load_torch(model_name)
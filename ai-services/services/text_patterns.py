@@ -0,0 +1,155 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Rule-based dictionaries for description analysis. Earlier entries win where a
+# single value is returned (first category, first brand, first color).
+
+CATEGORY_KEYWORDS = {
+    'electronics': [
+        'phone', 'laptop', 'tablet', 'charger', 'headphones', 'camera', 'watch',
+        # Whole-word matching no longer finds "phone" inside these
+        'iphone', 'smartphone', 'earphones', 'earbuds', 'airpods', 'ipad', 'macbook'
+    ],
+    'accessories': ['wallet', 'purse', 'bag', 'jewelry', 'ring', 'necklace', 'bracelet'],
+    'clothing': ['shirt', 'pants', 'jacket', 'shoes', 'dress', 'hat', 'scarf'],
+    'documents': ['id', 'card', 'license', 'passport', 'certificate', 'document'],
+    'keys': ['key', 'keychain', 'remote'],
+    'books': ['book', 'notebook', 'textbook', 'novel', 'magazine'],
+    'sports': ['ball', 'racket', 'equipment', 'gear', 'sports']
+}
+
+URGENCY_KEYWORDS = {
+    'high': ['urgent', 'emergency', 'asap', 'immediately', 'important', 'desperately', 'please help'],
+    'medium': ['please', 'help', 'need', 'missing', 'lost today', 'reward']
+}
+
+LOCATION_INDICATORS = [
+    'near', 'at', 'in', 'outside', 'inside', 'between', 'behind', 'front',
+    'library', 'cafeteria', 'gate', 'building', 'room', 'floor', 'campus',
+    'college', 'university', 'school', 'hospital', 'park', 'mall', 'station'
+]
+
+BRANDS = [
+    'apple', 'samsung', 'sony', 'nike', 'adidas', 'puma', 'hp', 'dell',
+    'lenovo', 'asus', 'acer', 'microsoft', 'google', 'amazon', 'flipkart',
+    'rolex', 'casio', 'titan', 'fossil', 'seiko', 'omega', 'gucci', 'prada'
+]
+
+COLORS = [
+    'black', 'white', 'red', 'blue', 'green', 'yellow', 'orange',
+    'purple', 'pink', 'brown', 'gray', 'grey', 'silver', 'gold',
+    'cyan', 'magenta', 'maroon', 'navy', 'olive', 'lime', 'dark', 'light'
+]
+
+SIZE_INDICATORS = [
+    'small', 'medium', 'large', 'big', 'huge', 'tiny', 'mini',
+    'compact', 'xl', 'xxl', 'size', 'inch', 'cm', 'mm',
+    'tall', 'short', 'wide', 'narrow', 'thick', 'thin'
+]
+
+CONDITION_WORDS = [
+    'new', 'old', 'used', 'worn', 'damaged', 'broken', 'cracked',
+    'scratched', 'mint', 'excellent', 'good', 'fair', 'poor',
+    'working', 'not working', 'functional', 'defective'
+]
+
+CONTACT_WORDS = ['call', 'contact', 'phone', 'email', 'reach', 'whatsapp', 'message']
+
+TONE_KEYWORDS = {
+    'worried': ['worried', 'anxious', 'desperate'],
+    'frustrated': ['angry', 'frustrated', 'annoyed'],
+    'hopeful': ['hope', 'hopeful', 'optimistic']
+}
+
+# Entity extraction vocabularies
+ENTITY_BRANDS = [
+    'apple', 'samsung', 'sony', 'nike', 'adidas', 'puma', 'hp', 'dell', 'lenovo', 'asus', 'microsoft', 'google',
+    'rolex', 'casio', 'titan', 'fossil', 'seiko', 'omega',
+    'gucci', 'prada', 'louis vuitton', 'chanel', 'hermes'
+]
+ENTITY_PLACES = ['library', 'cafeteria', 'gate', 'building', 'hostel', 'campus', 'college', 'university']
+ENTITY_COLORS = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'brown', 'gray', 'silver', 'gold', 'pink', 'purple', 'orange']
+MATERIALS = ['leather', 'plastic', 'metal', 'fabric', 'cotton', 'silk', 'wool', 'denim']
+
+# Nouns whose plural reads as another word ("ids")
+NO_PLURAL = {'id'}
+
+# Precompiled regexes shared by every request
+PREPOSITION_PHRASE_PATTERN = re.compile(r'\b(near|at|in|outside|inside|between|behind)\s+(\w+)\b')
+NUMBER_PATTERN = re.compile(r'\b\d+\b')
+PHONE_PATTERN = re.compile(r'\b\d{10}\b|\b\d{3}[-.\s]\d{3}[-.\s]\d{4}\b')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+
+class PhraseMatcher:
+    """
+    Every dictionary compiled into one word-boundary alternation, so a single
+    scan of the lowercased text yields all entity classes. Whole words only
+    ("at" does not match "cat"). Only phrases of plural_classes (noun
+    vocabularies) also match their plural, so "keychains" finds "keychain"
+    while "news" and "ins" do not find "new" and "in".
+    """
+
+    def __init__(self, dictionaries: Dict[str, List[str]], plural_classes: Iterable[str] = ()):
+        self.dictionaries = dictionaries
+        self.plural_classes = set(plural_classes)
+        self._owners: Dict[str, List[str]] = {}
+        # Phrase -> the one suffix accepted as its plural
+        self._plural_suffix: Dict[str, str] = {}
+        for entity_class, phrases in dictionaries.items():
+            for phrase in phrases:
+                self._owners.setdefault(phrase, []).append(entity_class)
+                if entity_class in self.plural_classes and phrase not in NO_PLURAL:
+                    self._plural_suffix[phrase] = 'es' if phrase.endswith(('s', 'x', 'z', 'ch', 'sh')) else 's'
+
+        # Longest first so multi-word phrases win over their prefixes
+        alternation = '|'.join(
+            re.escape(phrase).replace(r'\ ', r'\s+')
+            for phrase in sorted(self._owners, key=len, reverse=True)
+        )
+        self.pattern = re.compile(rf'\b({alternation})(e?s)?\b')
+
+    def scan(self, text_lower: str) -> Dict[str, List[str]]:
+        """Matched phrases per entity class, in order of appearance, without duplicates"""
+        found: Dict[str, List[str]] = {}
+        for match in self.pattern.finditer(text_lower):
+            phrase = ' '.join(match.group(1).split())
+            suffix = match.group(2)
+            owners = self._owners.get(phrase, [])
+            if suffix:
+                if self._plural_suffix.get(phrase) != suffix:
+                    continue
+                owners = [entity_class for entity_class in owners if entity_class in self.plural_classes]
+            for entity_class in owners:
+                phrases = found.setdefault(entity_class, [])
+                if phrase not in phrases:
+                    phrases.append(phrase)
+        return found
+
+    def first_by_priority(self, found: Dict[str, List[str]], entity_class: str) -> Optional[str]:
+        """The matched phrase listed earliest in the class dictionary"""
+        matched = set(found.get(entity_class, []))
+        return next((phrase for phrase in self.dictionaries[entity_class] if phrase in matched), None)
+
+
+def _build_matcher() -> PhraseMatcher:
+    dictionaries = {f'category:{category}': words for category, words in CATEGORY_KEYWORDS.items()}
+    dictionaries.update({f'urgency:{level}': words for level, words in URGENCY_KEYWORDS.items()})
+    dictionaries.update({f'tone:{tone}': words for tone, words in TONE_KEYWORDS.items()})
+    dictionaries.update({
+        'location': LOCATION_INDICATORS,
+        'brand': BRANDS,
+        'color': COLORS,
+        'size': SIZE_INDICATORS,
+        'condition': CONDITION_WORDS,
+        'contact': CONTACT_WORDS,
+        'entity_brand': ENTITY_BRANDS,
+        'entity_place': ENTITY_PLACES,
+        'entity_color': ENTITY_COLORS,
+        'material': MATERIALS
+    })
+    plural_classes = [entity_class for entity_class in dictionaries if entity_class.startswith('category:')]
+    return PhraseMatcher(dictionaries, plural_classes + ['entity_place'])
+
+
+TEXT_MATCHER = _build_matcher()
@@ -0,0 +1,103 @@
+import os
+import cv2
+import numpy as np
+from typing import List
+from utils.logger import logger
+from utils.assets import timed_load
+
+# histogram: color histogram + texture stats (no model), cnn: MobileNetV3-Small pooled features
+BACKENDS = ('histogram', 'cnn')
+
+HISTOGRAM_MODEL = "hist99-v1"
+CNN_MODEL = "mobilenet_v3_small-v1"
+
+_IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def histogram_features(image) -> np.ndarray:
+    """
+    96-bin color histogram (32 per BGR channel) plus texture stats. Histograms are
+    normalized per channel and square-rooted so a dot product behaves like the
+    Bhattacharyya coefficient instead of being dominated by image size.
+    """
+    pixel_count = float(image.shape[0] * image.shape[1])
+    features = []
+
+    for i in range(3):
+        hist = cv2.calcHist([image], [i], None, [32], [0, 256]).flatten() / pixel_count
+        features.append(np.sqrt(hist))
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, 50, 150)
+    texture = np.array([
+        np.std(gray) / 128.0,
+        np.mean(gray) / 255.0,
+        np.count_nonzero(edges) / pixel_count
+    ], dtype=np.float32)
+    features.append(texture)
+
+    return np.concatenate(features).astype(np.float32)
+
+
+class VisualEmbedder:
+    """Produces L2-normalized float32 visual vectors for decoded BGR images"""
+
+    def __init__(self, backend: str = None):
+        self.backend = (backend or os.getenv("VISUAL_EMBEDDING_BACKEND", "histogram")).lower()
+        if self.backend not in BACKENDS:
+            logger.warning(f"Unknown VISUAL_EMBEDDING_BACKEND '{self.backend}', using histogram")
+            self.backend = 'histogram'
+        self.batch_size = int(os.getenv("VISUAL_EMBEDDING_BATCH_SIZE", 16))
+        self.cnn = None
+
+    def initialize(self):
+        if self.backend != 'cnn':
+            return
+        try:
+            import torch
+            from torchvision.models import mobilenet_v3_small, MobileNet_V3_Small_Weights
+
+            with timed_load('mobilenet_v3_small'):
+                model = mobilenet_v3_small(weights=MobileNet_V3_Small_Weights.DEFAULT)
+                # Drop the classifier head to expose the 576-d pooled features
+                model.classifier = torch.nn.Identity()
+                model.eval()
+            self.cnn = model
+        except Exception as e:
+            logger.error(f"Failed to load CNN visual backbone, using histogram features: {str(e)}")
+            self.backend = 'histogram'
+
+    @property
+    def model_name(self) -> str:
+        return CNN_MODEL if self.backend == 'cnn' else HISTOGRAM_MODEL
+
+    def embed_batch(self, images: List[np.ndarray]) -> np.ndarray:
+        """Embed several images at once, returning an (n, d) L2-normalized float32 array"""
+        if not images:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        if self.backend == 'cnn':
+            return l2_normalize(self._embed_cnn(images))
+        return l2_normalize(np.stack([histogram_features(image) for image in images]))
+
+    def _embed_cnn(self, images: List[np.ndarray]) -> np.ndarray:
+        import torch
+
+        outputs = []
+        for start in range(0, len(images), self.batch_size):
+            batch = []
+            for image in images[start:start + self.batch_size]:
+                rgb = cv2.cvtColor(cv2.resize(image, (224, 224), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+                batch.append((rgb.astype(np.float32) / 255.0 - _IMAGENET_MEAN) / _IMAGENET_STD)
+
+            tensor = torch.from_numpy(np.stack(batch).transpose(0, 3, 1, 2).copy())
+            with torch.inference_mode():
+                outputs.append(self.cnn(tensor).numpy())
+
+        return np.vstack(outputs)
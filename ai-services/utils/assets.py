@@ -0,0 +1,207 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any
+from utils.logger import logger
+
+# Bump when the set of required models/corpora changes so nodes pick up a fresh bundle
+DEFAULT_ASSET_VERSION = "2024.1"
+
+# NLTK resource name -> path used by nltk.data.find
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+    'punkt': 'tokenizers/punkt',
+}
+
+# Only published for newer NLTK releases, so missing it is not fatal
+OPTIONAL_NLTK_RESOURCES = {
+    'punkt_tab': 'tokenizers/punkt_tab',
+}
+
+SENTENCE_TRANSFORMER_MODELS = ['all-MiniLM-L6-v2']
+TRANSFORMER_MODELS = ['cardiffnlp/twitter-roberta-base-emotion']
+SPACY_MODELS = ['en_core_web_sm']
+# Optional CNN backbone for visual embeddings (VISUAL_EMBEDDING_BACKEND=cnn)
+TORCHVISION_MODELS = ['mobilenet_v3_small']
+
+# Model name -> load time in milliseconds, filled in as services start
+load_timings: Dict[str, float] = {}
+
+
+def is_offline() -> bool:
+    return os.getenv("AI_OFFLINE_MODE", "false").lower() == "true"
+
+
+def asset_dir() -> str:
+    """Versioned directory holding the local asset bundle"""
+    root = os.getenv("AI_ASSET_DIR", "assets")
+    version = os.getenv("AI_ASSET_VERSION", DEFAULT_ASSET_VERSION)
+    return os.path.join(root, version)
+
+
+def nltk_dir() -> str:
+    return os.path.join(asset_dir(), 'nltk_data')
+
+
+def model_dir(kind: str, name: str) -> str:
+    """Local directory for a model of the given kind (sentence_transformers/transformers/spacy)"""
+    return os.path.join(asset_dir(), kind, name.replace('/', '__'))
+
+
+def configure_environment():
+    """
+    Point every library at the local bundle. Must run before transformers or
+    sentence_transformers are imported, since the hub reads these flags at import time.
+    """
+    if is_offline():
+        os.environ['HF_HUB_OFFLINE'] = '1'
+        os.environ['TRANSFORMERS_OFFLINE'] = '1'
+        logger.info(f"Offline mode enabled - loading assets only from {asset_dir()}")
+
+    # torchvision caches pretrained weights under $TORCH_HOME/hub/checkpoints
+    local_torch = os.path.join(asset_dir(), 'torch')
+    if is_offline() or os.path.isdir(local_torch):
+        os.environ['TORCH_HOME'] = local_torch
+
+    import nltk
+    local_nltk = nltk_dir()
+    if os.path.isdir(local_nltk) and local_nltk not in nltk.data.path:
+        nltk.data.path.insert(0, local_nltk)
+
+
+def ensure_nltk_resources():
+    """Make sure required NLTK corpora are available, downloading only when missing"""
+    import nltk
+
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if is_offline():
+                raise RuntimeError(
+                    f"NLTK resource '{name}' not found in {nltk_dir()} - "
+                    f"run 'python -m scripts.fetch_assets' on a connected machine"
+                )
+            logger.info(f"Downloading missing NLTK resource: {name}")
+            nltk.download(name, quiet=True)
+
+    if not is_offline():
+        for name, path in OPTIONAL_NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                nltk.download(name, quiet=True)
+
+
+def resolve_model(kind: str, name: str) -> str:
+    """
+    Return the local bundle path for a model if present, otherwise the hub name.
+    In offline mode a missing local copy is an error instead of a network fetch.
+    """
+    local_path = model_dir(kind, name)
+    if os.path.isdir(local_path):
+        return local_path
+    if is_offline():
+        raise RuntimeError(
+            f"Model '{name}' not found in {local_path} - "
+            f"run 'python -m scripts.fetch_assets' on a connected machine"
+        )
+    return name
+
+
+@contextmanager
+def timed_load(name: str):
+    """Record how long loading a model takes"""
+    start = time.perf_counter()
+    yield
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    load_timings[name] = round(elapsed_ms, 1)
+    logger.info(f"Loaded {name} in {elapsed_ms:.0f} ms")
+
+
+def fetch_nltk_resources() -> List[str]:
+    import nltk
+
+    target = nltk_dir()
+    os.makedirs(target, exist_ok=True)
+    fetched = []
+    for name in list(NLTK_RESOURCES) + list(OPTIONAL_NLTK_RESOURCES):
+        if nltk.download(name, download_dir=target, quiet=True):
+            fetched.append(name)
+        elif name in NLTK_RESOURCES:
+            raise RuntimeError(f"Failed to download NLTK resource: {name}")
+        else:
+            logger.warning(f"Optional NLTK resource not available: {name}")
+    return fetched
+
+
+def fetch_sentence_transformer(name: str) -> str:
+    from sentence_transformers import SentenceTransformer
+
+    target = model_dir('sentence_transformers', name)
+    SentenceTransformer(name).save(target)
+    return target
+
+
+def fetch_transformer(name: str) -> str:
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    target = model_dir('transformers', name)
+    AutoTokenizer.from_pretrained(name).save_pretrained(target)
+    AutoModelForSequenceClassification.from_pretrained(name).save_pretrained(target)
+    return target
+
+
+def fetch_spacy_model(name: str) -> str:
+    import spacy
+
+    try:
+        nlp = spacy.load(name)
+    except OSError:
+        from spacy.cli import download
+        download(name)
+        nlp = spacy.load(name)
+
+    target = model_dir('spacy', name)
+    nlp.to_disk(target)
+    return target
+
+
+def fetch_torchvision_weights(name: str) -> str:
+    from torchvision.models import get_model_weights
+
+    target = os.path.join(asset_dir(), 'torch')
+    os.environ['TORCH_HOME'] = target
+    get_model_weights(name).DEFAULT.get_state_dict(progress=False)
+    return target
+
+
+def fetch_all() -> Dict[str, Any]:
+    """Download every model and corpus the services need into the versioned asset directory"""
+    os.makedirs(asset_dir(), exist_ok=True)
+    manifest = {
+        'version': os.path.basename(asset_dir()),
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'nltk': fetch_nltk_resources(),
+        'sentence_transformers': {},
+        'transformers': {},
+        'spacy': {},
+        'torchvision': {}
+    }
+
+    for name in SENTENCE_TRANSFORMER_MODELS:
+        manifest['sentence_transformers'][name] = fetch_sentence_transformer(name)
+    for name in TRANSFORMER_MODELS:
+        manifest['transformers'][name] = fetch_transformer(name)
+    for name in SPACY_MODELS:
+        manifest['spacy'][name] = fetch_spacy_model(name)
+    for name in TORCHVISION_MODELS:
+        manifest['torchvision'][name] = fetch_torchvision_weights(name)
+
+    with open(os.path.join(asset_dir(), 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+from utils.logger import logger
+
+
+class TieredCache:
+    """
+    Two-tier cache for JSON-serializable values: an in-memory LRU in front of a
+    persistent SQLite file. Both tiers honour a TTL; the memory tier is bounded
+    by entry count and the persistent tier by total stored bytes.
+
+    Memory hits are answered on the event loop; every SQLite read and write runs
+    in a worker thread. The file is opened in WAL mode with a busy timeout so the
+    uvicorn workers can share it. Access times are recorded in memory and flushed,
+    together with expiry and the byte budget, at most once per maintenance interval.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1000,
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        path: Optional[str] = None,
+        persistent: bool = True
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.maintenance_seconds = float(os.getenv("CACHE_MAINTENANCE_SECONDS", 60))
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # Keys read since the last maintenance pass -> last access time
+        self._touched: Dict[str, float] = {}
+        self._last_maintenance = time.time()
+        self._lock = threading.Lock()
+        # One connection shared by the worker threads
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "maintenance_runs": 0}
+
+        if persistent:
+            path = path or os.path.join(os.getenv("CACHE_DIR", os.path.join("data", "cache")), f"{name}.sqlite3")
+            busy_timeout_ms = int(os.getenv("CACHE_BUSY_TIMEOUT_MS", 5000))
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self._db = sqlite3.connect(path, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+                # WAL lets workers read while another writes; NORMAL syncs only at checkpoints
+                self._db.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+                self._db.execute("PRAGMA journal_mode = WAL")
+                self._db.execute("PRAGMA synchronous = NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                    "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON cache (accessed_at)")
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Persistent cache '{name}' unavailable, using memory only: {str(e)}")
+                self._db = None
+
+    async def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key, now)
+            if row is not None:
+                value, expires_at = row
+                with self._lock:
+                    self._remember(key, value, expires_at)
+                    self._touched[key] = now
+                    self.stats["persistent_hits"] += 1
+                return value
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._touched.pop(key, None)
+            self.stats["sets"] += 1
+
+        if self._db is not None:
+            await asyncio.to_thread(self._db_set, key, value, expires_at, now)
+
+    async def delete(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        with self._lock:
+            in_memory = {key for key in keys if self._memory.pop(key, None) is not None}
+            for key in keys:
+                self._touched.pop(key, None)
+        in_db = await asyncio.to_thread(self._db_delete, keys) if self._db is not None else set()
+        return len(in_memory | in_db)
+
+    async def clear(self) -> int:
+        with self._lock:
+            removed = len(self._memory)
+            self._memory.clear()
+            self._touched.clear()
+        if self._db is not None:
+            removed = max(removed, await asyncio.to_thread(self._db_clear))
+        return removed
+
+    def flush(self):
+        """Write pending access times and enforce limits now (e.g. at shutdown)"""
+        if self._db is not None:
+            with self._db_lock:
+                self._maintain(time.time())
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["memory_hits"] + self.stats["persistent_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["persistent_hits"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    # The methods below run in worker threads
+
+    def _db_get(self, key: str, now: float) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._db.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            self._maybe_maintain(now)
+        # Expired rows are left for the next maintenance pass
+        if row is None or row[1] <= now:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _db_set(self, key: str, value: Any, expires_at: float, now: float):
+        payload = json.dumps(value)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now)
+            )
+            self._maybe_maintain(now)
+            self._db.commit()
+
+    def _db_delete(self, keys: List[str]) -> Set[str]:
+        with self._db_lock:
+            removed = {key for key in keys if self._db.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0}
+            self._db.commit()
+        return removed
+
+    def _db_clear(self) -> int:
+        with self._db_lock:
+            removed = self._db.execute("DELETE FROM cache").rowcount
+            self._db.commit()
+        return removed
+
+    def _maybe_maintain(self, now: float):
+        if now - self._last_maintenance >= self.maintenance_seconds:
+            self._maintain(now)
+            self._db.commit()
+
+    def _maintain(self, now: float):
+        """Flush access times, drop expired rows and enforce the byte budget (caller holds _db_lock)"""
+        self._last_maintenance = now
+        self.stats["maintenance_runs"] += 1
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            self._db.executemany(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in touched.items()]
+            )
+
+        self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used rows until back under the byte budget
+        for key, size in self._db.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
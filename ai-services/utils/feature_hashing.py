@@ -0,0 +1,65 @@
+import hashlib
+import numpy as np
+from typing import List, Tuple
+
+# Bump whenever the token scheme, hash function or dimension changes;
+# vectors with different versions must never be compared
+IMAGE_FEATURES_VERSION = "fh1-100"
+IMAGE_FEATURES_DIM = 100
+
+
+def stable_hash(token: str) -> int:
+    """64-bit hash that is identical across processes, hosts and restarts (unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def hash_features(weighted_tokens: List[Tuple[str, float]], dim: int = IMAGE_FEATURES_DIM) -> np.ndarray:
+    """
+    Signed feature hashing: each token lands in bucket hash % dim with sign taken
+    from the top hash bit, so collisions cancel out on average instead of piling up.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    if not weighted_tokens:
+        return vector
+
+    hashes = np.fromiter(
+        (stable_hash(token) for token, _ in weighted_tokens),
+        dtype=np.uint64,
+        count=len(weighted_tokens)
+    )
+    weights = np.fromiter(
+        (weight for _, weight in weighted_tokens),
+        dtype=np.float32,
+        count=len(weighted_tokens)
+    )
+
+    buckets = (hashes % np.uint64(dim)).astype(np.intp)
+    signs = np.where((hashes >> np.uint64(63)) & np.uint64(1), -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, buckets, signs * weights)
+    return vector
+
+
+def normalize_token(namespace: str, value: str) -> str:
+    return f"{namespace}:{' '.join(str(value).lower().split())}"
+
+
+def encode_image_analysis(image_analysis: dict, dim: int = IMAGE_FEATURES_DIM) -> np.ndarray:
+    """Hash colors, objects and Gemini tags from an image analysis into an L2-normalized vector"""
+    tokens = []
+
+    for color_info in (image_analysis.get('colors') or [])[:5]:
+        color_name = color_info.get('color', '')
+        if color_name:
+            tokens.append((normalize_token('color', color_name), color_info.get('percentage', 0) / 100.0))
+
+    for obj in (image_analysis.get('objects') or [])[:10]:
+        if obj:
+            tokens.append((normalize_token('object', obj), 0.5))
+
+    for tag in (image_analysis.get('gemini_tags') or [])[:20]:
+        if tag:
+            tokens.append((normalize_token('tag', tag), 1.0))
+
+    vector = hash_features(tokens, dim)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,100 @@
+import os
+import asyncio
+import importlib.util
+import httpx
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from utils.logger import logger
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class AsyncHttpClient:
+    """
+    Shared async HTTP client with keep-alive connection pooling, HTTP/2 when the
+    h2 package is installed, and a concurrency limit per host. Create once at
+    startup and close at shutdown.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        self.max_connections = max_connections or int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+        self.max_keepalive_connections = max_keepalive_connections or int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+        self.per_host_limit = per_host_limit or int(os.getenv("HTTP_PER_HOST_LIMIT", 8))
+        self.connect_timeout = connect_timeout or float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+        self.read_timeout = read_timeout or float(os.getenv("HTTP_READ_TIMEOUT", 30))
+        self.max_response_bytes = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", 20 * 1024 * 1024))
+        if http2 is None:
+            http2 = os.getenv("HTTP_ENABLE_HTTP2", "true").lower() == "true"
+        self.http2 = http2 and _http2_available()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def started(self) -> bool:
+        return self._client is not None
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        )
+        logger.info(
+            f"HTTP client started (http2={self.http2}, max_connections={self.max_connections}, "
+            f"per_host_limit={self.per_host_limit})"
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("HTTP client closed")
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def get_bytes(self, url: str, max_bytes: Optional[int] = None) -> bytes:
+        """
+        GET a URL and return the body, raising httpx.HTTPError on failure. Bodies
+        larger than max_bytes are rejected while streaming, before they are buffered.
+        """
+        if self._client is None:
+            await self.start()
+        max_bytes = max_bytes or self.max_response_bytes
+
+        async with self._host_limit(url):
+            async with self._client.stream('GET', url) as response:
+                response.raise_for_status()
+
+                declared = int(response.headers.get('content-length') or 0)
+                if declared > max_bytes:
+                    raise ValueError(f"Response too large: {declared} bytes exceeds {max_bytes}")
+
+                chunks = []
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise ValueError(f"Response too large: more than {max_bytes} bytes")
+                    chunks.append(chunk)
+                return b''.join(chunks)
@@ -0,0 +1,200 @@
+import time
+import bisect
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+from utils.logger import logger
+from utils.tracing import span, record_span
+
+# Seconds; spans sub-millisecond rule stages up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = Tuple[str, str, float]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: Dict[str, str] = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: Any, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            yield self.name, _format_labels(self.label_names, values), value
+
+
+class Histogram:
+    """Fixed-bucket histogram; an observation is one bisect and three additions under a lock"""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf bucket count, sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: Any):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = [(values, list(series)) for values, series in self._series.items()]
+        for values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket", _format_labels(self.label_names, values, {"le": le}), cumulative
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Gauge:
+    """Read at scrape time from a callback returning {label values: value} (or a bare number)"""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], callback: Callable[[], Any]):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.callback = callback
+
+    def samples(self) -> Iterator[Sample]:
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for label_values, value in values.items():
+            if value is None:
+                continue
+            if not isinstance(label_values, tuple):
+                label_values = (label_values,)
+            yield self.name, _format_labels(self.label_names, label_values), value
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...], callback: Callable[[], Any]) -> Gauge:
+        self._metrics[name] = Gauge(name, help, labels, callback)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                logger.error(f"Failed to collect metric {metric.name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "ai_stage_duration_seconds",
+    "Wall time of each analysis and matching pipeline stage",
+    labels=("stage",)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "ai_http_request_duration_seconds",
+    "End-to-end handler time per endpoint",
+    labels=("method", "route", "status")
+)
+LLM_PROVIDER_SECONDS = registry.histogram(
+    "ai_llm_provider_duration_seconds",
+    "Latency of successful calls per LLM provider",
+    labels=("provider",)
+)
+LLM_CALLS = registry.counter(
+    "ai_llm_calls_total",
+    "LLM calls by kind and outcome (success, error, shed, unavailable)",
+    labels=("kind", "outcome")
+)
+
+
+def observe_stage(stage: str, seconds: float, **attributes):
+    """Record a stage timed elsewhere; inside a traced request it also becomes a span ending now"""
+    STAGE_SECONDS.observe(seconds, stage)
+    record_span(stage, seconds, **attributes)
+
+
+@contextmanager
+def stage_timer(stage: str, **attributes):
+    """Time a stage into the histogram and, inside a traced request, a span of the same name"""
+    start = time.perf_counter()
+    with span(stage, **attributes) as current:
+        try:
+            yield current
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+
+def timed_stage(stage: str):
+    """Decorator form of stage_timer for sync and async functions"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage_timer(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils.logger import logger
+
+SERVICE_NAME = "lost-found-ai-services"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux); None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _parse_traceparent(header: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """W3C traceparent (00-<trace id>-<parent span id>-<flags>) -> (trace id, parent span id)"""
+    parts = (header or "").strip().split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        try:
+            int(parts[1], 16), int(parts[2], 16)
+            return parts[1], parts[2]
+        except ValueError:
+            pass
+    return None, None
+
+
+class Span:
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any],
+                 kind: int = SPAN_KIND_INTERNAL, start_ns: Optional[int] = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.spans.append(self)
+
+
+class _NoopSpan:
+    """Returned outside a traced request so callers never need to check"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans of one request plus the process CPU time and RSS measured around it"""
+
+    def __init__(self, trace_id: Optional[str] = None, remote_parent_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.remote_parent_id = remote_parent_id
+        # Finished spans, appended from the event loop and worker threads
+        self.spans: List[Span] = []
+        self.cpu_start = time.process_time()
+        self.rss_start = _rss_bytes()
+
+    def cpu_ms(self) -> float:
+        # Process-wide: exact for a request served alone, an upper bound under concurrency
+        return (time.process_time() - self.cpu_start) * 1000
+
+    def rss_delta(self) -> Optional[int]:
+        rss = _rss_bytes()
+        return rss - self.rss_start if rss is not None and self.rss_start is not None else None
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    Child span of the current one. A no-op outside a traced request. Context is
+    copied into asyncio tasks and asyncio.to_thread, but not run_in_executor.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(trace, name, parent.span_id if parent else trace.remote_parent_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except asyncio.CancelledError:
+        current.set_attribute("cancelled", True)
+        raise
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def record_span(name: str, seconds: float, **attributes):
+    """Span for work timed elsewhere (e.g. in a worker process), ending now"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    end_ns = time.time_ns()
+    Span(
+        trace, name, parent.span_id if parent else trace.remote_parent_id, attributes,
+        start_ns=end_ns - int(seconds * 1e9)
+    ).end(end_ns)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Tracer:
+    """
+    Per-request tracing. Each request gets a trace id (or continues an incoming
+    W3C traceparent), spans are collected in memory, summarised per stage in a
+    Server-Timing header and, when TRACE_EXPORT_PATH is set, appended to a JSONL
+    file with one OTLP/JSON ExportTraceServiceRequest per line (the format of the
+    OpenTelemetry Collector file exporter).
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+        self.server_timing = os.getenv("TRACE_SERVER_TIMING", "true").lower() == "true"
+        self.export_path = os.getenv("TRACE_EXPORT_PATH", "")
+        # Only export requests at least this slow
+        self.export_min_ms = float(os.getenv("TRACE_EXPORT_MIN_MS", 0))
+        self.excluded_paths = {
+            path.strip() for path in os.getenv("TRACE_EXCLUDE_PATHS", "/metrics,/health").split(",") if path.strip()
+        }
+        self._write_lock = threading.Lock()
+        self.stats = {"traces": 0, "exported": 0, "export_errors": 0}
+
+    def should_trace(self, path: str) -> bool:
+        return self.enabled and path not in self.excluded_paths
+
+    @contextmanager
+    def start(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Span]:
+        """Root span of a request; the trace is exported when it closes"""
+        trace = Trace(*_parse_traceparent(traceparent))
+        trace_token = _current_trace.set(trace)
+        root = Span(trace, name, trace.remote_parent_id, attributes, kind=SPAN_KIND_SERVER)
+        span_token = _current_span.set(root)
+        try:
+            yield root
+        except Exception as e:
+            root.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            root.set_attribute("process.cpu_ms", round(trace.cpu_ms(), 2))
+            root.set_attribute("process.rss_delta_bytes", trace.rss_delta())
+            root.end()
+            self.stats["traces"] += 1
+            self.export(root)
+
+    def server_timing_header(self, root: Span) -> str:
+        """total, cpu and rss entries, then each stage's summed duration in first-finished order"""
+        trace = root.trace
+        stages: Dict[str, List[float]] = {}
+        for finished in list(trace.spans):
+            entry = stages.setdefault(finished.name, [0.0, 0])
+            entry[0] += finished.duration_ms
+            entry[1] += 1
+
+        parts = [f"total;dur={root.duration_ms:.1f}", f"cpu;dur={trace.cpu_ms():.1f}"]
+        rss_delta = trace.rss_delta()
+        if rss_delta is not None:
+            parts.append(f'rss;desc="{rss_delta / 1048576:+.1f}MB"')
+        for name, (ms, count) in stages.items():
+            # Concurrent spans (several images, hedged LLM calls) are summed
+            parts.append(f'{name};dur={ms:.1f}' + (f';desc="x{count}"' if count > 1 else ""))
+        return ", ".join(parts)
+
+    def export(self, root: Span):
+        if not self.export_path or root.duration_ms < self.export_min_ms:
+            return
+        line = json.dumps(self._to_otlp(root.trace), separators=(",", ":"))
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._write, line)
+        except RuntimeError:
+            self._write(line)
+
+    def _write(self, line: str):
+        try:
+            with self._write_lock, open(self.export_path, "a") as f:
+                f.write(line + "\n")
+            self.stats["exported"] += 1
+        except OSError as e:
+            self.stats["export_errors"] += 1
+            logger.error(f"Trace export to {self.export_path} failed: {str(e)}")
+
+    def _to_otlp(self, trace: Trace) -> Dict[str, Any]:
+        spans = []
+        for finished in trace.spans:
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": finished.span_id,
+                "name": finished.name,
+                "kind": finished.kind,
+                "startTimeUnixNano": str(finished.start_ns),
+                "endTimeUnixNano": str(finished.end_ns),
+                "attributes": _otlp_attributes(finished.attributes),
+                "status": {"code": STATUS_ERROR, "message": finished.error} if finished.error else {"code": STATUS_UNSET}
+            }
+            if finished.parent_id:
+                otlp_span["parentSpanId"] = finished.parent_id
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME, "process.pid": os.getpid()})},
+                "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": spans}]
+            }]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "export_path": self.export_path or None,
+            **self.stats
+        }
+
+
+tracer = Tracer()
@@ -170,6 +170,7 @@ class ItemController {
         description: description.trim(),
         category,
         images: imageUrls, // Use Cloudinary URLs instead of local paths
+        imageFiles: Array.isArray(req.files) ? req.files : [], // Analyzed from memory, no download
       });
   
       // Step 2: Create item with AI metadata
@@ -189,6 +190,11 @@ class ItemController {
       });
   
       const savedItem = await newItem.save();
+
+      // Register the images for near-duplicate search
+      if (savedItem.aiMetadata?.perceptualHashes?.length) {
+        await aiService.indexImageHashes(String(savedItem._id), savedItem.aiMetadata.perceptualHashes);
+      }
   
       // Step 3: Find matches using AI services
       logger.info(`Finding AI-powered matches for ${type} item: ${savedItem._id}`);
@@ -652,6 +658,11 @@ class ItemController {
       }
   
       const updatedItem = await item.save();
+
+      // Re-analysis may have changed the images; replace their near-duplicate entries
+      if (significantChange || newImages.length > 0) {
+        await aiService.indexImageHashes(String(updatedItem._id), updatedItem.aiMetadata?.perceptualHashes || []);
+      }
   
       res.json({
         success: true,
@@ -735,6 +746,7 @@ class ItemController {
   
       // Delete the item
       await ItemModel.findByIdAndDelete(id);
+      await aiService.removeImageHashes(id);
   
       // Update user statistics
       await User.findByIdAndUpdate(req.user?.id, {
@@ -31,6 +31,12 @@ interface ImageAnalysis {
 
 interface AiMetadata {
   imageFeatures: number[];
+  imageFeaturesVersion?: string;
+  visualEmbedding?: number[];
+  visualEmbeddingModel?: string;
+  textEmbeddingReduced?: number[];
+  projectionVersion?: string;
+  perceptualHashes?: string[];
   textEmbedding: number[];
   confidence?: number;
   textAnalysis?: TextAnalysis;
@@ -175,6 +181,12 @@ const ItemSchema = new Schema<ItemDocument>(
     },
     aiMetadata: {
       imageFeatures: [Number],
+      imageFeaturesVersion: String,
+      visualEmbedding: [Number],
+      visualEmbeddingModel: String,
+      textEmbeddingReduced: [Number],
+      projectionVersion: String,
+      perceptualHashes: [String],
       textEmbedding: [Number],
       confidence: { 
         type: Number, 
@@ -20,7 +20,7 @@ class AIService {
   async analyzeItem(itemData: any): Promise<AIAnalysisResult> {
     try {
       logger.info('Starting enhanced AI analysis for item', itemData.title);
-      const { title, description, category, images, tags } = itemData;
+      const { title, description, category, images, imageFiles, tags } = itemData;
     
       // Step 1: Enhanced text analysis using Gemini AI (only description)
       const textAnalysis = await this.analyzeTextEnhanced(description);
@@ -28,7 +28,10 @@ class AIService {
       
       // Step 2: Analyze images (if any)
       let imageAnalysis = null;
-      if (images && images.length > 0) {
+      if (imageFiles && imageFiles.length > 0) {
+        // Send the buffers we already hold instead of making the AI service download them back
+        imageAnalysis = await this.analyzeImageFiles(imageFiles);
+      } else if (images && images.length > 0) {
         logger.info("im",images)
         imageAnalysis = await this.analyzeImages(images);
         logger.info("im",imageAnalysis)
@@ -54,6 +57,12 @@ class AIService {
     
       return {
         imageFeatures: embeddings.imageFeatures || Array(100).fill(0),
+        imageFeaturesVersion: embeddings.imageFeaturesVersion,
+        visualEmbedding: embeddings.visualEmbedding || [],
+        visualEmbeddingModel: embeddings.visualEmbeddingModel,
+        textEmbeddingReduced: embeddings.textEmbeddingReduced || [],
+        projectionVersion: embeddings.projectionVersion,
+        perceptualHashes: embeddings.perceptualHashes || [],
         textEmbedding: embeddings.textEmbedding || Array(384).fill(0),
         confidence,
         textAnalysis: {
@@ -288,6 +297,42 @@ async findSimilarItems(sourceItem: any, targetType: string): Promise<MatchResult
     }
   }
 
+  // Keep the AI service's near-duplicate image index in step with saved items.
+  // Best effort: a failure is logged and never blocks saving or deleting the item.
+  async indexImageHashes(itemId: string, hashes: string[] = []): Promise<void> {
+    if (hashes.length === 0) {
+      await this.removeImageHashes(itemId);
+      return;
+    }
+    try {
+      await axios.post(`${this.baseURL}/images/hash-index`, {
+        item_id: itemId,
+        hashes
+      }, {
+        headers: {
+          'Authorization': `Bearer ${this.apiKey}`,
+          'Content-Type': 'application/json'
+        },
+        timeout: this.timeout
+      });
+    } catch (error) {
+      logger.error(`Failed to index image hashes for item ${itemId}:`, error);
+    }
+  }
+
+  async removeImageHashes(itemId: string): Promise<void> {
+    try {
+      await axios.delete(`${this.baseURL}/images/hash-index/${encodeURIComponent(itemId)}`, {
+        headers: {
+          'Authorization': `Bearer ${this.apiKey}`
+        },
+        timeout: this.timeout
+      });
+    } catch (error) {
+      logger.error(`Failed to remove image hashes for item ${itemId}:`, error);
+    }
+  }
+
   private async analyzeImages(imageUrls: string[]): Promise<any> {
     try {
       // Your FastAPI endpoint expects URLs, not files
@@ -311,6 +356,33 @@ async findSimilarItems(sourceItem: any, targetType: string): Promise<MatchResult
     }
   }
 
+  private async analyzeImageFiles(files: Express.Multer.File[]): Promise<any> {
+    try {
+      const form = new FormData();
+      files.forEach((file, index) => {
+        form.append('files', file.buffer, {
+          filename: file.originalname || `image${index + 1}`,
+          contentType: file.mimetype
+        });
+      });
+  
+      const response = await axios.post(`${this.baseURL}/analyze/images/upload`, form, {
+        headers: {
+          ...form.getHeaders(),
+          'Authorization': `Bearer ${this.apiKey}`
+        },
+        timeout: this.timeout,
+        maxBodyLength: Infinity
+      });
+  
+      return response.data;
+  
+    } catch (error) {
+      logger.error('Image upload analysis failed:', error);
+      return this.getFallbackImageAnalysis();
+    }
+  }
+
   private async generateEmbeddings(analysisData: any): Promise<any> {
     try {
       const response = await axios.post(`${this.baseURL}/embeddings/generate`, analysisData, {
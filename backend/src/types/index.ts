@@ -93,6 +93,12 @@ export interface Item {
   
   export interface AIAnalysisResult {
     imageFeatures: number[];
+    imageFeaturesVersion?: string;
+    visualEmbedding?: number[];
+    visualEmbeddingModel?: string;
+    textEmbeddingReduced?: number[];
+    projectionVersion?: string;
+    perceptualHashes?: string[];
     textEmbedding: number[];
     confidence: number;
     textAnalysis: any;